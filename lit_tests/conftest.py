@@ -0,0 +1,145 @@
+# Copyright 2025 The IREE Authors
+#
+# Licensed under the Apache License v2.0 with LLVM Exceptions.
+# See https://llvm.org/LICENSE.txt for license information.
+# SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
+
+"""
+In-process pytest driver for the lit tests.
+
+Running the suite through lit spawns a python and a FileCheck process per test
+file. When collected by pytest (`pytest lit_tests`), each test file is instead
+executed in the current interpreter with its output captured and matched
+against its `CHECK` directives using the pure python `filecheck` package.
+
+Set `WAVE_LIT_SUBPROCESS=1` to pipe the captured output through the FileCheck
+executable instead (e.g. to use LLVM FileCheck).
+"""
+
+import contextlib
+import io
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+_IGNORED_FILES = {"__init__.py", "conftest.py", "lit.cfg.py", "lit.site.cfg.py"}
+
+
+def _available_features() -> set[str]:
+    features = set()
+    if int(os.environ.get("WAVE_TEST_WATER", 0)):
+        features.add("water")
+    return features
+
+
+def _parse_directives(path: str) -> tuple[list[str], list[str]]:
+    run_lines = []
+    requires = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("# RUN:"):
+                run_lines.append(line[len("# RUN:") :].strip())
+            elif line.startswith("# REQUIRES:"):
+                requires.extend(
+                    r.strip() for r in line[len("# REQUIRES:") :].split(",")
+                )
+    return run_lines, requires
+
+
+def _run_filecheck(check_file: str, output: str) -> tuple[int, str]:
+    """
+    Matches `output` against the directives in `check_file` and returns the
+    exit code and diagnostics.
+    """
+    use_subprocess = int(os.environ.get("WAVE_LIT_SUBPROCESS", 0))
+    if not use_subprocess:
+        try:
+            from filecheck.matcher import Matcher
+            from filecheck.options import parse_argv_options
+        except ImportError:
+            use_subprocess = True
+
+    if use_subprocess:
+        filecheck_exe = (
+            os.environ.get("WAVE_FILECHECK")
+            or shutil.which("FileCheck")
+            or shutil.which("filecheck")
+        )
+        if filecheck_exe is None:
+            pytest.skip("FileCheck not found")
+        result = subprocess.run(
+            [filecheck_exe, check_file, "--dump-input=fail"],
+            input=output,
+            capture_output=True,
+            text=True,
+        )
+        return result.returncode, result.stdout + result.stderr
+
+    opts = parse_argv_options(["filecheck", check_file])
+    diagnostics = io.StringIO()
+    old_stdin = sys.stdin
+    sys.stdin = io.StringIO(output)
+    try:
+        with contextlib.redirect_stdout(diagnostics), contextlib.redirect_stderr(
+            diagnostics
+        ):
+            returncode = Matcher.from_opts(opts).run()
+    finally:
+        sys.stdin = old_stdin
+    return returncode, diagnostics.getvalue()
+
+
+class LitFileItem(pytest.Item):
+    def __init__(self, *, run_line: str, requires: list[str], **kwargs):
+        super().__init__(**kwargs)
+        self.run_line = run_line
+        self.requires = requires
+
+    def runtest(self):
+        missing = [r for r in self.requires if r not in _available_features()]
+        if missing:
+            pytest.skip(f"missing features: {', '.join(missing)}")
+
+        path = str(self.path)
+        output = io.StringIO()
+        redirect_stderr = (
+            contextlib.redirect_stderr(output)
+            if "2>&1" in self.run_line
+            else contextlib.nullcontext()
+        )
+        with contextlib.redirect_stdout(output), redirect_stderr:
+            runpy.run_path(path, run_name="__main__")
+
+        returncode, diagnostics = _run_filecheck(path, output.getvalue())
+        if returncode != 0:
+            raise AssertionError(f"FileCheck failed for {path}:\n{diagnostics}")
+
+    def reportinfo(self):
+        return self.path, 0, f"lit: {self.name}"
+
+
+class LitFile(pytest.File):
+    def collect(self):
+        run_lines, requires = _parse_directives(str(self.path))
+        for run_line in run_lines:
+            if "FileCheck" not in run_line:
+                continue
+            yield LitFileItem.from_parent(
+                self, name=self.path.stem, run_line=run_line, requires=requires
+            )
+
+
+def pytest_configure(config):
+    # Mirror the environment set up by lit.cfg.py before wave_lang is imported.
+    os.environ["WAVE_CACHE_ON"] = "0"
+
+
+def pytest_collect_file(parent, file_path):
+    if file_path.suffix != ".py" or file_path.name in _IGNORED_FILES:
+        return None
+    return LitFile.from_parent(parent, path=file_path)
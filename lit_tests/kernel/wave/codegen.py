@@ -384,6 +384,119 @@ def test_read_write_masked_shared():
     # CHECK:            vector.maskedstore {{.*}} : memref<1x3xf16, strided<[3, 1], offset: ?>>, vector<4xi1>, vector<4xf16>
 
 
+@run_test
+def test_read_write_masked_buffer_dynamic():
+    constraints: list[tkw.Constraint] = [
+        tkw.HardwareConstraint(threads_per_wave=64, vector_shapes={M: 4, N: 4})
+    ]
+    constraints += [tkw.WorkgroupConstraint(M, BLOCK_M, 0)]
+    constraints += [tkw.WorkgroupConstraint(N, BLOCK_N, 1)]
+    constraints += [tkw.WaveConstraint(M, BLOCK_M)]
+    constraints += [tkw.WaveConstraint(N, BLOCK_N)]
+
+    @tkw.wave(constraints)
+    def read_write_masked_buffer_dynamic(
+        a: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f16],
+        b: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f16],
+    ):
+        res = tkw.read(a)
+        tkw.write(res, b)
+
+    options = WaveCompileOptions(
+        subs={
+            M: 4,
+            BLOCK_M: 4,
+            BLOCK_N: 4,
+            ADDRESS_SPACE: GLOBAL_ADDRESS_SPACE,
+        },
+        dynamic_symbols=[N],
+        use_buffer_load_ops=True,
+        use_buffer_store_ops=True,
+        canonicalize=True,
+        compile_to_mlir=True,
+    )
+    read_write_masked_buffer_dynamic = wave_compile(
+        options, read_write_masked_buffer_dynamic
+    )
+    print(read_write_masked_buffer_dynamic.asm)
+
+    # The mask on the dynamic fastest dim differs per element, so the access
+    # is a full width buffer op when every lane is in bounds and unrolled
+    # otherwise.
+    # CHECK-LABEL:    func.func @read_write_masked_buffer_dynamic
+    # CHECK:            %[[BUF:.*]] = amdgpu.fat_raw_buffer_cast
+    # CHECK:            %[[ALL:.*]] = vector.reduction <and>, %{{.*}} : vector<4xi1> into i1
+    # CHECK:            %[[RES:.*]] = scf.if %[[ALL]] -> (vector<4xf16>) {
+    # CHECK:              %[[FULL:.*]] = vector.load %[[BUF]][%{{.*}}] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<4xf16>
+    # CHECK:              scf.yield %[[FULL]] : vector<4xf16>
+    # CHECK:            } else {
+    # CHECK:              %[[STEP:.*]] = vector.step : vector<4xindex>
+    # CHECK:              %[[LANES:.*]] = arith.addi %[[STEP]], %{{.*}} : vector<4xindex>
+    # CHECK:              arith.select %{{.*}}, %[[LANES]], %{{.*}} : vector<4xi1>, vector<4xindex>
+    # CHECK-COUNT-4:      vector.load %[[BUF]][%{{.*}}] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<1xf16>
+    # CHECK:              %[[ELEMS:.*]] = vector.from_elements
+    # CHECK:              scf.yield %[[ELEMS]] : vector<4xf16>
+    # CHECK:            }
+    # CHECK:            %[[OUT:.*]] = amdgpu.fat_raw_buffer_cast
+    # CHECK:            scf.if %{{.*}} {
+    # CHECK:              vector.store %[[RES]], %[[OUT]][%{{.*}}] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<4xf16>
+    # CHECK:            } else {
+    # CHECK-COUNT-4:      vector.store %{{.*}}, %[[OUT]][%{{.*}}] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<1xf16>
+    # CHECK:            }
+
+
+@run_test
+def test_read_write_masked_buffer_splat():
+    constraints: list[tkw.Constraint] = [
+        tkw.HardwareConstraint(threads_per_wave=64, vector_shapes={M: 4, N: 4})
+    ]
+    constraints += [tkw.WorkgroupConstraint(M, BLOCK_M, 0)]
+    constraints += [tkw.WorkgroupConstraint(N, BLOCK_N, 1)]
+    constraints += [tkw.WaveConstraint(M, BLOCK_M)]
+    constraints += [tkw.WaveConstraint(N, BLOCK_N)]
+
+    @tkw.wave(constraints)
+    def read_write_masked_buffer_splat(
+        a: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f16],
+        b: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f16],
+    ):
+        res = tkw.read(a)
+        tkw.write(res, b)
+
+    options = WaveCompileOptions(
+        subs={
+            N: 4,
+            BLOCK_M: 4,
+            BLOCK_N: 4,
+            ADDRESS_SPACE: GLOBAL_ADDRESS_SPACE,
+        },
+        dynamic_symbols=[M],
+        use_buffer_load_ops=True,
+        use_buffer_store_ops=True,
+        canonicalize=True,
+        compile_to_mlir=True,
+    )
+    read_write_masked_buffer_splat = wave_compile(
+        options, read_write_masked_buffer_splat
+    )
+    print(read_write_masked_buffer_splat.asm)
+
+    # Only the dynamic outer dim is masked, so the mask is the same for every
+    # element and a scalar select on the base offset replaces the unrolling.
+    # CHECK-LABEL:    func.func @read_write_masked_buffer_splat
+    # CHECK-NOT:        vector.reduction
+    # CHECK-NOT:        scf.if
+    # CHECK-NOT:        vector.step
+    # CHECK:            %[[BUF:.*]] = amdgpu.fat_raw_buffer_cast
+    # CHECK:            %[[IDX:.*]] = arith.select %{{.*}}, %{{.*}}, %{{.*}} : index
+    # CHECK:            %[[RES:.*]] = vector.load %[[BUF]][%[[IDX]]] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<4xf16>
+    # CHECK:            %[[OUT:.*]] = amdgpu.fat_raw_buffer_cast
+    # CHECK:            %[[OUT_IDX:.*]] = arith.select %{{.*}}, %{{.*}}, %{{.*}} : index
+    # CHECK:            vector.store %[[RES]], %[[OUT]][%[[OUT_IDX]]] : memref<?xf16, #amdgpu.address_space<fat_raw_buffer>>, vector<4xf16>
+    # CHECK-NOT:        vector.step
+    # CHECK:            return
+
+
 @run_test
 def test_read_write_mapping():
     constraints: list[tkw.Constraint] = [
@@ -2519,3 +2632,141 @@ def test_atomic_min():
     # CHECK:            %[[atm_3:.+]] = memref.atomic_rmw mins %{{.*}}, %[[alloc]][%[[C0]], %[[val_3]]]
     # CHECK:            amdgpu.lds_barrier
     # CHECK:            vector.load %[[alloc]][%[[C0]], %[[val_0]]]
+
+
+@run_test
+def test_scatter_add_single_element():
+    constraints: list[tkw.Constraint] = [
+        tkw.HardwareConstraint(
+            threads_per_wave=64,
+            waves_per_block=(1, 1, 1),
+            vector_shapes={M: 64, N: 1},
+        ),
+        tkw.WorkgroupConstraint(M, BLOCK_M, 0),
+        tkw.WorkgroupConstraint(N, BLOCK_N, 1),
+        tkw.WaveConstraint(M, BLOCK_M),
+        tkw.WaveConstraint(N, BLOCK_N),
+    ]
+
+    i = tkw.IndexMapping.iterator(0)
+    j = tkw.IndexMapping.iterator(1)
+    mapping = tkw.IndexMapping(
+        num_iterators=2,
+        inputs={M: i, N: j},
+        outputs={M: i, N: j},
+    )
+
+    @tkw.wave(constraints)
+    def scatter_add(
+        a: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.f32],
+        index: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.i32],
+        lds: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f32],
+        b: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.f32],
+    ):
+        a_reg = tkw.read(a, elements_per_thread=1)
+        index_reg = tkw.read(index, elements_per_thread=1)
+        tkw.scatter_add(
+            a_reg,
+            index_reg,
+            dim=0,
+            memory=lds,
+            mapping=mapping,
+            elements_per_thread=1,
+        )
+        lds_reg = tkw.read(lds, elements_per_thread=1, mapping=mapping)
+        tkw.write(lds_reg, b, elements_per_thread=1, mapping=mapping)
+
+    options = WaveCompileOptions(
+        subs={
+            M: 64,
+            N: 64,
+            BLOCK_M: 64,
+            BLOCK_N: 64,
+            ADDRESS_SPACE: tkl.AddressSpace.SHARED_MEMORY.value,
+        },
+        compile_to_mlir=True,
+    )
+    scatter_add = wave_compile(options, scatter_add)
+    print(scatter_add.asm)
+
+    # With a single element per thread, every thread issues exactly one atomic.
+    # CHECK-LABEL: test_scatter_add_single_element
+    # CHECK:         func.func @scatter_add
+    # CHECK:           memref.atomic_rmw addf
+    # CHECK-NOT:       memref.atomic_rmw
+    # CHECK:           return
+
+
+@run_test
+def test_scatter_add_multi_element():
+    constraints: list[tkw.Constraint] = [
+        tkw.HardwareConstraint(
+            threads_per_wave=64,
+            waves_per_block=(1, 1, 1),
+            vector_shapes={M: 64, N: 4},
+        ),
+        tkw.WorkgroupConstraint(M, BLOCK_M, 0),
+        tkw.WorkgroupConstraint(N, BLOCK_N, 1),
+        tkw.WaveConstraint(M, BLOCK_M),
+        tkw.WaveConstraint(N, BLOCK_N),
+    ]
+
+    i = tkw.IndexMapping.iterator(0)
+    j = tkw.IndexMapping.iterator(1)
+    mapping = tkw.IndexMapping(
+        num_iterators=2,
+        inputs={M: i, N: j},
+        outputs={M: i, N: j},
+    )
+
+    @tkw.wave(constraints)
+    def scatter_add(
+        a: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.f32],
+        index: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.i32],
+        lds: tkl.Memory[M, N, ADDRESS_SPACE, tkl.f32],
+        b: tkl.Memory[M, N, GLOBAL_ADDRESS_SPACE, tkl.f32],
+    ):
+        a_reg = tkw.read(a, elements_per_thread=4)
+        index_reg = tkw.read(index, elements_per_thread=4)
+        tkw.scatter_add(
+            a_reg,
+            index_reg,
+            dim=0,
+            memory=lds,
+            mapping=mapping,
+            elements_per_thread=4,
+        )
+        lds_reg = tkw.read(lds, elements_per_thread=4, mapping=mapping)
+        tkw.write(lds_reg, b, elements_per_thread=4, mapping=mapping)
+
+    options = WaveCompileOptions(
+        subs={
+            M: 64,
+            N: 64,
+            BLOCK_M: 64,
+            BLOCK_N: 64,
+            ADDRESS_SPACE: tkl.AddressSpace.SHARED_MEMORY.value,
+        },
+        compile_to_mlir=True,
+        canonicalize=False,
+    )
+    scatter_add = wave_compile(options, scatter_add)
+    print(scatter_add.asm)
+
+    # The shared memory is flattened once and every lane gets a single linear
+    # offset, `idx * stride + base` plus its constant offset along N.
+    # CHECK-LABEL: test_scatter_add_multi_element
+    # CHECK:         func.func @scatter_add
+    # CHECK:           %[[FLAT:.*]] = memref.reinterpret_cast %{{.*}} to memref<?xf32, strided<[1], offset: ?>, #gpu.address_space<workgroup>>
+    # CHECK:           %[[IDX:.*]] = arith.index_cast %{{.*}} : vector<4xi32> to vector<4xindex>
+    # CHECK:           %[[SCALED:.*]] = arith.muli %[[IDX]], %{{.*}} overflow<nsw> : vector<4xindex>
+    # CHECK:           %[[OFFSETS:.*]] = arith.addi %[[SCALED]], %{{.*}} overflow<nsw> : vector<4xindex>
+    # CHECK:           %[[LANES:.*]] = arith.constant dense<[0, 1, 2, 3]> : vector<4xindex>
+    # CHECK:           %[[LANE_OFFSETS:.*]] = arith.addi %[[OFFSETS]], %[[LANES]] overflow<nsw> : vector<4xindex>
+    # CHECK:           %[[ELEMS:.*]]:4 = vector.to_elements %[[LANE_OFFSETS]] : vector<4xindex>
+    # CHECK:           memref.atomic_rmw addf %{{.*}}, %[[FLAT]][%[[ELEMS]]#0] : (f32, memref<?xf32, strided<[1], offset: ?>, #gpu.address_space<workgroup>>) -> f32
+    # CHECK:           memref.atomic_rmw addf %{{.*}}, %[[FLAT]][%[[ELEMS]]#1] : (f32, memref<?xf32, strided<[1], offset: ?>, #gpu.address_space<workgroup>>) -> f32
+    # CHECK:           memref.atomic_rmw addf %{{.*}}, %[[FLAT]][%[[ELEMS]]#2] : (f32, memref<?xf32, strided<[1], offset: ?>, #gpu.address_space<workgroup>>) -> f32
+    # CHECK:           memref.atomic_rmw addf %{{.*}}, %[[FLAT]][%[[ELEMS]]#3] : (f32, memref<?xf32, strided<[1], offset: ?>, #gpu.address_space<workgroup>>) -> f32
+    # CHECK-NOT:       memref.atomic_rmw
+    # CHECK:           return
@@ -42,9 +42,9 @@ def test_trace_empty_then_add_nodes():
     trace = test()
 
     graph = trace.get_root_graph()
-    a = list(graph.nodes)[0]
+    a = next(iter(graph.nodes))
     # Insert at the end of the graph
-    with graph.inserting_before(list(graph.nodes)[-1]):
+    with graph.inserting_before(next(reversed(graph.nodes))):
         read = Read(a).add_to_graph(graph)
         write = Write(read, a, 4).add_to_graph(graph)
 
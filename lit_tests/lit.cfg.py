@@ -28,19 +28,14 @@ config.suffixes = [".py"]
 config.test_source_root = os.path.dirname(__file__)
 
 # config.use_default_substitutions()
-config.excludes = ["__init__.py", "lit.cfg.py", "lit.site.cfg.py"]
-
-config.substitutions.extend(
-    [
-        ("%PYTHON", sys.executable),
-    ]
-)
+config.excludes = ["__init__.py", "conftest.py", "lit.cfg.py", "lit.site.cfg.py"]
 
 if int(os.environ.get("WAVE_TEST_WATER", 0)):
     config.available_features.add("water")
 
-# Find a suitable filecheck.
-filecheck_exe = None
+# Find a suitable filecheck. The result is exported through WAVE_FILECHECK so
+# that subsequent lit invocations can skip the PATH search.
+filecheck_exe = os.environ.get("WAVE_FILECHECK")
 if filecheck_exe is None:
     filecheck_exe = shutil.which("FileCheck")
     if filecheck_exe:
@@ -50,19 +45,23 @@ if filecheck_exe is None:
     if filecheck_exe:
         logger.debug(f"Using pure python filecheck: {filecheck_exe}")
 
+substitutions = [("%PYTHON", sys.executable)]
 if filecheck_exe is not None:
-    config.substitutions.extend(
-        [
-            ("FileCheck", filecheck_exe),
-        ]
-    )
+    os.environ["WAVE_FILECHECK"] = filecheck_exe
+    substitutions.append(("FileCheck", filecheck_exe))
 else:
     logger.error(
         "FileCheck not found "
         "(install pure python version with 'pip install filecheck')"
     )
 
-project_root = os.path.dirname(os.path.dirname(__file__))
+config.substitutions.extend(substitutions)
+
+project_root = os.path.dirname(config.test_source_root)
 lit.llvm.llvm_config.with_environment("PYTHONPATH", project_root, append_path=True)
-config.environment["FILECHECK_OPTS"] = "--dump-input=fail"
-config.environment["WAVE_CACHE_ON"] = "0"
+config.environment.update(
+    {
+        "FILECHECK_OPTS": "--dump-input=fail",
+        "WAVE_CACHE_ON": "0",
+    }
+)
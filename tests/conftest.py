@@ -7,6 +7,7 @@
 import os
 import pytest
 import sys
+import torch
 
 # Add the project root to Python path to ensure aplp_lib can be found
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -16,19 +17,17 @@ if project_root not in sys.path:
 
 @pytest.fixture(scope="function", autouse=True)
 def seed_torch():
-    import torch
-
     torch.manual_seed(0)
 
 
 @pytest.fixture
 def run_bench(request):
-    return request.config.getoption("--runperf")
+    return request.config._wave_runperf
 
 
 @pytest.fixture
 def dump_perf_path(request):
-    return request.config.getoption("--dump-perf-files-path")
+    return request.config._wave_dump_perf
 
 
 @pytest.fixture
@@ -61,10 +60,11 @@ def perf_filename_iree(dump_perf_path, request):
 
 @pytest.fixture(scope="function", autouse=True)
 def set_mlir_filename(request):
-    option = request.config.getoption("--dump-mlir-files-path")
+    option = request.config._wave_dump_mlir
     if not option:
         return
 
+    # Deferred so the common case (no dump path) never touches run_utils.
     import wave_lang.kernel.wave.utils.run_utils as run_utils
 
     run_utils.dump_generated_mlir = True
@@ -119,6 +119,13 @@ def pytest_configure(config):
         "markers", "validate_only: validation test, never runs with '--runperf'"
     )
 
+    # Read the options once here so per-test fixtures only do attribute lookups.
+    config._wave_runperf = config.getoption("--runperf")
+    config._wave_dump_perf = config.getoption("--dump-perf-files-path")
+    config._wave_dump_mlir = config.getoption("--dump-mlir-files-path")
+
+    _setup_wave_globals(config)
+
 
 def _get_worker_id(config):
     """
@@ -138,68 +145,52 @@ def _get_worker_id(config):
     return int(worker_id[2:])
 
 
-def _set_default_device(config):
+def _setup_wave_globals(config):
     """
-    Distributes the tests over multiple GPUs.
+    Distributes the tests over multiple GPUs, applies the cache setting and
+    gives each worker a unique cache directory to avoid race conditions.
     """
-    distribute = int(config.getoption("--gpu-distribute"))
-    if distribute < 1:
-        return
-
-    worker_id = _get_worker_id(config)
-    if worker_id is None:
-        return
-
-    device_id = worker_id % distribute
-
-    import wave_lang.kernel.wave.utils.general_utils as general_utils
-
-    general_utils.DEFAULT_GPU_DEVICE = device_id
-
-
-def _disable_cache(config):
     import wave_lang.kernel.wave.cache as cache
+    import wave_lang.kernel.wave.utils.general_utils as general_utils
 
     cache.WAVE_CACHE_ON = int(os.environ.get("WAVE_CACHE_ON", 0))
 
-
-def _set_cache_dir(config):
-    """
-    Sets the unique cache directory for the current worker to avoid race conditions.
-    """
     worker_id = _get_worker_id(config)
     if worker_id is None:
         return
 
-    import wave_lang.kernel.wave.cache as cache
+    distribute = int(config.getoption("--gpu-distribute"))
+    if distribute >= 1:
+        general_utils.DEFAULT_GPU_DEVICE = worker_id % distribute
 
-    base_cache_dir = cache.CACHE_BASE_DIR
-    cache.CACHE_BASE_DIR = base_cache_dir / f"worker_{worker_id}"
+    cache.CACHE_BASE_DIR = cache.CACHE_BASE_DIR / f"worker_{worker_id}"
 
 
-def _has_marker(item, marker):
-    return next(item.iter_markers(marker), None) is not None
+_SKIP_E2E = pytest.mark.skip("e2e tests are disabled")
+_SKIP_EXPENSIVE = pytest.mark.skip("expensive tests are disabled")
+_SKIP_NON_PERF = pytest.mark.skip("skip non-perf test")
+_SKIP_PERF = pytest.mark.skip("skip perf test")
 
 
 def pytest_collection_modifyitems(config, items):
-    _set_default_device(config)
-    _disable_cache(config)
-    _set_cache_dir(config)
     run_e2e = config.getoption("--run-e2e")
     run_expensive = config.getoption("--run-expensive-tests")
     run_perf = config.getoption("--runperf")
     for item in items:
-        if _has_marker(item, "require_e2e") and not run_e2e:
-            item.add_marker(pytest.mark.skip("e2e tests are disabled"))
+        # Collect marker names once per item instead of rescanning the marker
+        # chain for every check.
+        markers = {marker.name for marker in item.iter_markers()}
+        if "require_e2e" in markers and not run_e2e:
+            item.add_marker(_SKIP_E2E)
 
-        if _has_marker(item, "expensive_test") and not run_expensive:
-            item.add_marker(pytest.mark.skip("expensive tests are disabled"))
+        if "expensive_test" in markers and not run_expensive:
+            item.add_marker(_SKIP_EXPENSIVE)
 
-        is_validate_only = _has_marker(item, "validate_only")
-        is_perf_only = _has_marker(item, "perf_only")
+        is_validate_only = "validate_only" in markers
+        is_perf_only = "perf_only" in markers
         if run_perf:
             if not is_perf_only or is_validate_only:
-                item.add_marker(pytest.mark.skip("skip non-perf test"))
+                item.add_marker(_SKIP_NON_PERF)
         else:
             if is_perf_only:
-                item.add_marker(pytest.mark.skip("skip perf test"))
+                item.add_marker(_SKIP_PERF)
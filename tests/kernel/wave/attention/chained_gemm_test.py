@@ -4,6 +4,7 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import functools
 import pytest
 import torch
 import wave_lang.kernel.lang as tkl
@@ -34,50 +35,63 @@ from ..common.utils import (
 )
 from ..common.shapes import get_test_shapes
 
+# Input sizes
+B = tkl.sym.B
+M = tkl.sym.M
+N = tkl.sym.N
+K1 = tkl.sym.K1
+K2 = tkl.sym.K2
+# Workgroup tile sizes
+BLOCK_B = tkl.sym.BLOCK_B
+BLOCK_M = tkl.sym.BLOCK_M
+BLOCK_N = tkl.sym.BLOCK_N
+BLOCK_K2 = tkl.sym.BLOCK_K2
+# Address space (for GPU, shared(1) or global(0))
+ADDRESS_SPACE = tkl.sym.ADDRESS_SPACE
+# Other hyperparameters
+LOAD_ELEMS_PER_THREAD = tkl.sym.LOAD_ELEMS_PER_THREAD
+STORE_ELEMS_PER_THREAD = tkl.sym.STORE_ELEMS_PER_THREAD
 
-@require_e2e
-@pytest.mark.parametrize("shape", get_test_shapes("chained_gemm"))
-@param_bool("enable_scheduling", "sched", [False])
-@pytest.mark.parametrize(
-    "mfma_variant",
-    [
-        MMAType.F32_16x16x16_F16,
-        MMAType.F32_32x32x8_F16,
-    ],
+# User-constraints shared by all chained gemm tests, only the hardware
+# constraint depends on the MMA variant under test.
+_BASE_CONSTRAINTS: list[tkw.Constraint] = [
+    tkw.WorkgroupConstraint(M, BLOCK_M, 0),
+    tkw.WorkgroupConstraint(N, BLOCK_N, 1),
+    tkw.WorkgroupConstraint(B, BLOCK_B, 2),
+    tkw.TilingConstraint(K2, BLOCK_K2),
+    tkw.WaveConstraint(M, BLOCK_M / 2),
+    tkw.WaveConstraint(N, BLOCK_N / 2),
+]
+
+_MAPPING = tkw.IndexMapping(
+    num_iterators=3,
+    inputs={
+        B: tkw.IndexMapping.iterator(0),
+        M: tkw.IndexMapping.iterator(1),
+        N: tkw.IndexMapping.iterator(2),
+    },
+    outputs={
+        B: tkw.IndexMapping.iterator(0),
+        N: tkw.IndexMapping.iterator(2),
+        M: tkw.IndexMapping.iterator(1),
+    },
 )
-def testChainedGemm(
-    shape: tuple[int],
-    enable_scheduling: bool,
-    mfma_variant: MMAType,
-    run_bench,
-    perf_filename_tk,
-):
-    # Input sizes
-    B = tkl.sym.B
-    M = tkl.sym.M
-    N = tkl.sym.N
-    K1 = tkl.sym.K1
-    K2 = tkl.sym.K2
-    # Workgroup tile sizes
-    BLOCK_B = tkl.sym.BLOCK_B
-    BLOCK_M = tkl.sym.BLOCK_M
-    BLOCK_N = tkl.sym.BLOCK_N
-    BLOCK_K2 = tkl.sym.BLOCK_K2
-    # Address space (for GPU, shared(1) or global(0))
-    ADDRESS_SPACE = tkl.sym.ADDRESS_SPACE
-    # Other hyperparameters
-    LOAD_ELEMS_PER_THREAD = tkl.sym.LOAD_ELEMS_PER_THREAD
-    STORE_ELEMS_PER_THREAD = tkl.sym.STORE_ELEMS_PER_THREAD
 
-    # Expose user-constraints
-    constraints: list[tkw.Constraint] = [tkw.WorkgroupConstraint(M, BLOCK_M, 0)]
-    constraints += [tkw.WorkgroupConstraint(N, BLOCK_N, 1)]
-    constraints += [tkw.WorkgroupConstraint(B, BLOCK_B, 2)]
-    constraints += [tkw.TilingConstraint(K2, BLOCK_K2)]
-    constraints += [tkw.WaveConstraint(M, BLOCK_M / 2)]
-    constraints += [tkw.WaveConstraint(N, BLOCK_N / 2)]
 
-    constraints += [
+def _build_chained_gemm(
+    mfma_variant: MMAType,
+    shape: tuple[int],
+    run_bench: bool,
+    perf_filename_tk: str | None,
+    mma_dtype: tkl.DataType = tkl.f16,
+    second_mfma_variant: MMAType | None = None,
+):
+    """
+    Builds the chained gemm kernel for `mfma_variant`. When `mma_dtype` is not
+    f16 the inputs are cast to it before the MMAs, and `second_mfma_variant`
+    selects the MMA type of the second gemm if it differs from the first.
+    """
+    constraints = _BASE_CONSTRAINTS + [
         tkw.HardwareConstraint(
             threads_per_wave=64,
             mma_type=mfma_variant,
@@ -85,13 +99,6 @@ def testChainedGemm(
         )
     ]
 
-    i = tkw.IndexMapping.iterator(0)
-    j = tkw.IndexMapping.iterator(1)
-    k = tkw.IndexMapping.iterator(2)
-    mapping = tkw.IndexMapping(
-        num_iterators=3, inputs={B: i, M: j, N: k}, outputs={B: i, N: k, M: j}
-    )
-
     @tkw.wave(constraints)
     def chained_gemm(
         q: tkl.Memory[B, M, K1, GLOBAL_ADDRESS_SPACE, tkl.f16],
@@ -108,23 +115,30 @@ def testChainedGemm(
             inner_acc = tkl.Register[B, K2, M, tkl.f32](0.0)
             q_reg = tkw.read(q, elements_per_thread=LOAD_ELEMS_PER_THREAD)
             k_reg = tkw.read(k, elements_per_thread=LOAD_ELEMS_PER_THREAD)
+            if mma_dtype != tkl.f16:
+                q_reg = tkw.cast(q_reg, mma_dtype)
+                k_reg = tkw.cast(k_reg, mma_dtype)
             kq_reg = tkw.mma(k_reg, q_reg, inner_acc)
             qk_reg = tkw.permute(kq_reg, target_shape=[B, M, K2])
-            qk_cast_reg = tkw.cast(qk_reg, tkl.f16)
+            qk_cast_reg = tkw.cast(qk_reg, mma_dtype)
             v_reg = tkw.read(v, elements_per_thread=LOAD_ELEMS_PER_THREAD)
-            acc = tkw.mma(qk_cast_reg, v_reg, acc)
+            if mma_dtype != tkl.f16:
+                v_reg = tkw.cast(v_reg, mma_dtype)
+            acc = tkw.mma(qk_cast_reg, v_reg, acc, second_mfma_variant)
             return acc
 
         # repeat represents the results of the loop
         tkw.write(
-            repeat, c, mapping=mapping, elements_per_thread=STORE_ELEMS_PER_THREAD
+            repeat, c, mapping=_MAPPING, elements_per_thread=STORE_ELEMS_PER_THREAD
         )
 
     batch, q_seq_len, v_head_dim, qk_head_dim, kv_seq_len = shape
     hyperparams = {
         ADDRESS_SPACE: SHARED_ADDRESS_SPACE,
         LOAD_ELEMS_PER_THREAD: get_mfma_load_elems_per_thread(mfma_variant),
-        STORE_ELEMS_PER_THREAD: get_mfma_store_elems_per_thread(mfma_variant),
+        STORE_ELEMS_PER_THREAD: get_mfma_store_elems_per_thread(
+            second_mfma_variant or mfma_variant
+        ),
         BLOCK_B: 1,
         BLOCK_M: 64,
         BLOCK_N: 64,
@@ -147,10 +161,63 @@ def testChainedGemm(
     )
     options = set_default_run_config(options)
     chained_gemm = wave_compile(options, chained_gemm)
+    return chained_gemm, options
 
+
+@functools.lru_cache(maxsize=4)
+def _get_inputs(shape: tuple[int]) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Returns the q, k and v inputs for `shape`, generated once and shared by all
+    MMA variants. Callers should clone them before use.
+    """
+    batch, q_seq_len, v_head_dim, qk_head_dim, kv_seq_len = shape
     q = device_randn(batch, q_seq_len, qk_head_dim, dtype=torch.float16)
     k = device_randn(batch, kv_seq_len, qk_head_dim, dtype=torch.float16)
     v = device_randn(batch, v_head_dim, kv_seq_len, dtype=torch.float16)
+    return q, k, v
+
+
+@functools.lru_cache(maxsize=4)
+def _get_torch_reference(shape: tuple[int]) -> torch.Tensor:
+    """
+    Returns the torch reference result for `shape`, shared by all MMA variants.
+    """
+    q, k, v = _get_inputs(shape)
+    torch_qk = torch.matmul(q, k.transpose(-1, -2))
+    return torch.matmul(torch_qk, v.transpose(-1, -2))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def clear_cached_inputs():
+    yield
+    # Release the cached device tensors once the module is done with them.
+    _get_torch_reference.cache_clear()
+    _get_inputs.cache_clear()
+
+
+@require_e2e
+@pytest.mark.parametrize("shape", get_test_shapes("chained_gemm"))
+@param_bool("enable_scheduling", "sched", [False])
+@pytest.mark.parametrize(
+    "mfma_variant",
+    [
+        MMAType.F32_16x16x16_F16,
+        MMAType.F32_32x32x8_F16,
+    ],
+)
+def testChainedGemm(
+    shape: tuple[int],
+    enable_scheduling: bool,
+    mfma_variant: MMAType,
+    run_bench,
+    perf_filename_tk,
+):
+    chained_gemm, options = _build_chained_gemm(
+        mfma_variant, shape, run_bench, perf_filename_tk
+    )
+    batch, q_seq_len, v_head_dim, qk_head_dim, kv_seq_len = shape
+
+    q, k, v = (t.clone() for t in _get_inputs(shape))
     output = device_zeros(batch, v_head_dim, q_seq_len, dtype=torch.float32)
     chained_gemm(q, k, v, output)
 
@@ -158,8 +225,7 @@ def testChainedGemm(
     generate_iree_ref("chain_mmt", [q, k, v], [iree_ref], options)
     assert_close(output, iree_ref, check_device=False, atol=0, rtol=0)
 
-    torch_qk = torch.matmul(q, k.transpose(-1, -2))
-    torch_ref = torch.matmul(torch_qk, v.transpose(-1, -2))
+    torch_ref = _get_torch_reference(shape)
     output_for_cmp = output.transpose(-1, -2).to(torch.float16)
     assert_close(output_for_cmp, torch_ref, atol=5e-2, rtol=5e-3)
 
@@ -188,108 +254,17 @@ def testChainedGemmF8(
     run_bench,
     perf_filename_tk,
 ):
-    # Input sizes
-    B = tkl.sym.B
-    M = tkl.sym.M
-    N = tkl.sym.N
-    K1 = tkl.sym.K1
-    K2 = tkl.sym.K2
-    # Workgroup tile sizes
-    BLOCK_B = tkl.sym.BLOCK_B
-    BLOCK_M = tkl.sym.BLOCK_M
-    BLOCK_N = tkl.sym.BLOCK_N
-    BLOCK_K2 = tkl.sym.BLOCK_K2
-    # Address space (for GPU, shared(1) or global(0))
-    ADDRESS_SPACE = tkl.sym.ADDRESS_SPACE
-    # Other hyperparameters
-    LOAD_ELEMS_PER_THREAD = tkl.sym.LOAD_ELEMS_PER_THREAD
-    STORE_ELEMS_PER_THREAD = tkl.sym.STORE_ELEMS_PER_THREAD
-
-    # Expose user-constraints
-    constraints: list[tkw.Constraint] = [tkw.WorkgroupConstraint(M, BLOCK_M, 0)]
-    constraints += [tkw.WorkgroupConstraint(N, BLOCK_N, 1)]
-    constraints += [tkw.WorkgroupConstraint(B, BLOCK_B, 2)]
-    constraints += [tkw.TilingConstraint(K2, BLOCK_K2)]
-    constraints += [tkw.WaveConstraint(M, BLOCK_M / 2)]
-    constraints += [tkw.WaveConstraint(N, BLOCK_N / 2)]
-
-    constraints += [
-        tkw.HardwareConstraint(
-            threads_per_wave=64,
-            mma_type=mfma_variant[0],
-            vector_shapes={B: 0},
-        )
-    ]
-
-    i = tkw.IndexMapping.iterator(0)
-    j = tkw.IndexMapping.iterator(1)
-    k = tkw.IndexMapping.iterator(2)
-    mapping = tkw.IndexMapping(
-        num_iterators=3, inputs={B: i, M: j, N: k}, outputs={B: i, N: k, M: j}
+    chained_gemm_f8, options = _build_chained_gemm(
+        mfma_variant[0],
+        shape,
+        run_bench,
+        perf_filename_tk,
+        mma_dtype=tkl.f8e4m3fnuz,
+        second_mfma_variant=mfma_variant[1],
     )
-
-    @tkw.wave(constraints)
-    def chained_gemm_f8(
-        q: tkl.Memory[B, M, K1, GLOBAL_ADDRESS_SPACE, tkl.f16],
-        k: tkl.Memory[B, K2, K1, ADDRESS_SPACE, tkl.f16],
-        v: tkl.Memory[B, N, K2, ADDRESS_SPACE, tkl.f16],
-        c: tkl.Memory[B, N, M, GLOBAL_ADDRESS_SPACE, tkl.f32],
-    ):
-        c_reg = tkl.Register[B, M, N, tkl.f32](0.0)
-
-        @tkw.iterate(K2, init_args=[c_reg])
-        def repeat(
-            acc: tkl.Register[B, M, N, tkl.f32],
-        ) -> tkl.Register[B, M, N, tkl.f32]:
-            inner_acc = tkl.Register[B, K2, M, tkl.f32](0.0)
-            q_reg = tkw.read(q, elements_per_thread=LOAD_ELEMS_PER_THREAD)
-            k_reg = tkw.read(k, elements_per_thread=LOAD_ELEMS_PER_THREAD)
-            q_reg = tkw.cast(q_reg, tkl.f8e4m3fnuz)
-            k_reg = tkw.cast(k_reg, tkl.f8e4m3fnuz)
-            kq_reg = tkw.mma(k_reg, q_reg, inner_acc)
-            qk_reg = tkw.permute(kq_reg, target_shape=[B, M, K2])
-            qk_cast_reg = tkw.cast(qk_reg, tkl.f8e4m3fnuz)
-            v_reg = tkw.read(v, elements_per_thread=LOAD_ELEMS_PER_THREAD)
-            v_reg = tkw.cast(v_reg, tkl.f8e4m3fnuz)
-            acc = tkw.mma(qk_cast_reg, v_reg, acc, mfma_variant[1])
-            return acc
-
-        # repeat represents the results of the loop
-        tkw.write(
-            repeat, c, mapping=mapping, elements_per_thread=STORE_ELEMS_PER_THREAD
-        )
-
     batch, q_seq_len, v_head_dim, qk_head_dim, kv_seq_len = shape
-    hyperparams = {
-        ADDRESS_SPACE: SHARED_ADDRESS_SPACE,
-        LOAD_ELEMS_PER_THREAD: get_mfma_load_elems_per_thread(mfma_variant[0]),
-        STORE_ELEMS_PER_THREAD: get_mfma_store_elems_per_thread(mfma_variant[1]),
-        BLOCK_B: 1,
-        BLOCK_M: 64,
-        BLOCK_N: 64,
-        BLOCK_K2: 32,
-        B: batch,
-        M: q_seq_len,
-        N: v_head_dim,
-        K1: qk_head_dim,
-        K2: kv_seq_len,
-    }
-    hyperparams.update(get_default_scheduling_params())
-
-    options = WaveCompileOptions(
-        subs=hyperparams,
-        canonicalize=True,
-        run_bench=run_bench,
-        benchmark_batch_size=10,
-        benchmark_repetitions=3,
-        benchmark_results_file=perf_filename_tk,
-    )
-    options = set_default_run_config(options)
-    chained_gemm_f8 = wave_compile(options, chained_gemm_f8)
 
-    q = device_randn(batch, q_seq_len, qk_head_dim, dtype=torch.float16)
-    k = device_randn(batch, kv_seq_len, qk_head_dim, dtype=torch.float16)
-    v = device_randn(batch, v_head_dim, kv_seq_len, dtype=torch.float16)
+    q, k, v = (t.clone() for t in _get_inputs(shape))
     output = device_zeros(batch, v_head_dim, q_seq_len, dtype=torch.float32)
     chained_gemm_f8(q, k, v, output)
 
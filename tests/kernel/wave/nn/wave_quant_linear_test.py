@@ -4,6 +4,7 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import pytest
 import torch
 from torch import nn
 from torch.testing import assert_close
@@ -133,3 +134,97 @@ def testQLinearPerTensor1DBatchNoBias():
     rmse_error = torch.sqrt(torch.mean((wave_output - ref_output) ** 2)).item()
     assert absmax_error < 1e-1, "absmax is not less than the threshold"
     assert rmse_error < 1e-2, "RMSE is not less than the threshold"
+
+
+def _get_quant_linears(in_features, out_features, device, dtype, **kwargs):
+    quant_params = {
+        "weight_scale": torch.rand(1),
+        "weight_scale_shape": [1],
+        "input_scale": torch.rand(1),
+        "input_scale_shape": [1],
+        "qdtype": torch.float8_e4m3fnuz,
+    }
+    ref_linear = RefQuantLinear(
+        in_features,
+        out_features,
+        quant_params=quant_params,
+        device=device,
+        bias=False,
+    )
+    wave_linear = wave_nn.WaveQuantLinear(
+        in_features,
+        out_features,
+        quant_params=quant_params,
+        device=device,
+        dtype=dtype,
+        bias=False,
+        **kwargs,
+    )
+    with torch.no_grad():
+        wave_linear.weight.copy_(ref_linear.linear.weight.data)
+    return ref_linear, wave_linear
+
+
+def _check_output(wave_output, ref_output):
+    absmax_error = torch.abs(torch.max(wave_output - ref_output))
+    rmse_error = torch.sqrt(torch.mean((wave_output - ref_output) ** 2)).item()
+    assert absmax_error < 1e-1, "absmax is not less than the threshold"
+    assert rmse_error < 1e-2, "RMSE is not less than the threshold"
+
+
+@require_e2e
+@require_cdna3
+def testQLinearPerTensorCacheOutput():
+    torch.manual_seed(1)
+    batch = 16
+    input_len = 32
+    in_features = 64
+    out_features = 128
+    device = torch.device("cuda:0")
+    dtype = torch.float16
+    ref_linear, wave_linear = _get_quant_linears(
+        in_features, out_features, device, dtype, cache_output=True
+    )
+
+    test_inputs = torch.randn(batch, input_len, in_features, dtype=dtype, device=device)
+    first_output = wave_linear.forward(test_inputs)
+    _check_output(first_output, ref_linear.forward(test_inputs))
+
+    # Same shape: the cached buffer is reused, so both results alias.
+    test_inputs = torch.randn(batch, input_len, in_features, dtype=dtype, device=device)
+    second_output = wave_linear.forward(test_inputs)
+    assert second_output.data_ptr() == first_output.data_ptr()
+    _check_output(second_output, ref_linear.forward(test_inputs))
+
+    # A different shape gets a new buffer.
+    test_inputs = torch.randn(
+        batch // 2, input_len, in_features, dtype=dtype, device=device
+    )
+    third_output = wave_linear.forward(test_inputs)
+    assert third_output.shape == (batch // 2, input_len, out_features)
+    assert third_output.data_ptr() != first_output.data_ptr()
+    _check_output(third_output, ref_linear.forward(test_inputs))
+
+
+@require_e2e
+@require_cdna3
+@pytest.mark.parametrize("batch", [(), (2, 4)])
+def testQLinearPerTensorBatchRank(batch):
+    torch.manual_seed(1)
+    input_len = 32
+    in_features = 64
+    out_features = 128
+    device = torch.device("cuda:0")
+    dtype = torch.float16
+    ref_linear, wave_linear = _get_quant_linears(
+        in_features, out_features, device, dtype
+    )
+
+    # Rank 2 inputs have no batch dims, rank 4 inputs are flattened and
+    # restored around the kernel call.
+    test_inputs = torch.randn(
+        *batch, input_len, in_features, dtype=dtype, device=device
+    )
+    wave_output = wave_linear.forward(test_inputs)
+    assert wave_output.shape == (*batch, input_len, out_features)
+    _check_output(wave_output, ref_linear.forward(test_inputs))
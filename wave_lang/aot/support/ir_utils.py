@@ -5,15 +5,16 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import gzip
+import os
 import tempfile
+from collections import defaultdict
 from collections.abc import Sequence
 from dataclasses import dataclass
-from functools import partial
-from itertools import zip_longest
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Callable, Dict, Optional, Tuple
 
-import numpy as np
 import torch
 
 from iree.compiler.extras.fx_importer import (
@@ -159,6 +160,17 @@ class GlobalAttributes:
 ###############################################################################
 
 
+# Default initial value factories for scalar global types, keyed by TypeID.
+# TODO(#170): There should be a common way to check if a FloatType.
+_INITIAL_VALUE_FACTORIES: Dict[object, Callable[[IrType], Attribute]] = {
+    IntegerType.static_typeid: lambda t: IntegerAttr.get(t, 0),
+    IndexType.static_typeid: lambda t: IntegerAttr.get(t, 0),
+    F16Type.static_typeid: lambda t: FloatAttr.get(t, 0.0),
+    F32Type.static_typeid: lambda t: FloatAttr.get(t, 0.0),
+    F64Type.static_typeid: lambda t: FloatAttr.get(t, 0.0),
+}
+
+
 @dataclass
 class ModuleBuilderOptions:
     # Whether to import torch symbolic shape expressions for ExportedPrograms.
@@ -170,11 +182,17 @@ class ModuleBuilder:
 
     __slots__ = [
         "_auto_symbol_counts",
+        "_device_affinity_attr_cache",
+        "_dtype_to_iree_type_cache",
+        "_global_ip",
+        "_private_visibility_attr",
+        "_unit_attr",
         "body",
         "cache",
         "context",
         "fx_py_attr_tracker",
         "global_ref_tracker",
+        "index_type",
         "ip",
         "last_global_op",
         "module_op",
@@ -198,6 +216,9 @@ class ModuleBuilder:
         # To do so, record the last one emitted so that newly created ones
         # can be ordered properly.
         self.last_global_op: Optional[Operation] = None
+        # Insertion point before the first non-global op, once known. Globals
+        # created there land after the previous one without having to move.
+        self._global_ip: Optional[InsertionPoint] = None
         self.ip = InsertionPoint(self.body)
         self.cache = ContextCache(self.context)
         # Tracks global references to a MaterializedGlobal.
@@ -207,28 +228,45 @@ class ModuleBuilder:
         # as to better intern tensors to attributes.
         self.fx_py_attr_tracker = RefTracker()
         self.native_type_converter = NativeTypeConverter(self.context)
-        self._auto_symbol_counts: Dict[str, int] = {}
+        self._auto_symbol_counts: Dict[str, int] = defaultdict(int)
+        # IREE types are uniqued per context, so they can be reused across
+        # globals created in this module.
+        self._dtype_to_iree_type_cache: Dict[torch.dtype, IrType] = {}
+        # Device affinity attributes keyed by (ordinal, queues).
+        self._device_affinity_attr_cache: Dict[
+            Tuple[int, Optional[Tuple[str, ...]]], Attribute
+        ] = {}
+        # Attributes shared by every global and private function.
+        with self.context:
+            self._private_visibility_attr = StringAttr.get("private")
+            self._unit_attr = UnitAttr.get()
+            self.index_type = IndexType.get()
 
     def unique_auto_symbol(self, requested_name: str) -> str:
-        if requested_name not in self._auto_symbol_counts:
-            self._auto_symbol_counts[requested_name] = 0
+        count = self._auto_symbol_counts[requested_name]
+        self._auto_symbol_counts[requested_name] = count + 1
+        if count == 0:
             return requested_name
-        count = self._auto_symbol_counts[requested_name] + 1
-        self._auto_symbol_counts[requested_name] = count
         return f"{requested_name}${count}"
 
     def handle_mlir_error(self, op: Operation, e: MLIRError, message: str):
         # TODO: Replace with a real dumping facility.
         # See: https://github.com/nod-ai/SHARK-ModelDev/issues/136
-        dump_path = Path(tempfile.gettempdir()) / "turbine_module_builder_error.mlir"
+        # Printing a large module can take a long time, so only dump on request.
+        if not int(os.environ.get("WAVE_DUMP_MLIR_ON_ERROR", 0)):
+            logger.exception(
+                f"{message} (set WAVE_DUMP_MLIR_ON_ERROR=1 to dump the module)"
+            )
+            return
+        dump_path = Path(tempfile.gettempdir()) / "turbine_module_builder_error.mlir.gz"
         logger.exception(f"{message} (dumping to {dump_path})")
         try:
-            with open(dump_path, "wb") as f:
+            with gzip.open(dump_path, "wb") as f:
                 op.print(
                     file=f,
                     binary=True,
                     print_generic_op_form=True,
-                    large_elements_limit=100,
+                    large_elements_limit=10,
                 )
             logger.debug(f"Dump complete to {dump_path}")
         except Exception:
@@ -254,7 +292,7 @@ class ModuleBuilder:
             ftype = FunctionType.get(argument_types, [])
             func_op = func_d.FuncOp(symbol_name, ftype)
             if not is_public:
-                func_op.attributes["sym_visibility"] = StringAttr.get("private")
+                func_op.attributes["sym_visibility"] = self._private_visibility_attr
             if add_entry_block:
                 func_op.add_entry_block()
             self.symbol_table.insert(func_op)
@@ -264,11 +302,35 @@ class ModuleBuilder:
             return actual_symbol_name, func_op
 
     def torch_dtype_to_iree_type(self, dtype: torch.dtype) -> IrType:
+        iree_type = self._dtype_to_iree_type_cache.get(dtype)
+        if iree_type is not None:
+            return iree_type
         try:
             with self.context:
-                return TORCH_DTYPE_TO_IREE_TYPE[dtype]()
+                iree_type = TORCH_DTYPE_TO_IREE_TYPE[dtype]()
         except KeyError:
             raise TypeError(f"Could not map Torch dtype {dtype} to an IREE type")
+        self._dtype_to_iree_type_cache[dtype] = iree_type
+        return iree_type
+
+    def _device_affinity_attr(self, device: DeviceTensorTrait) -> Attribute:
+        key = (device.ordinal, None if device.queues is None else tuple(device.queues))
+        attr = self._device_affinity_attr_cache.get(key)
+        if attr is not None:
+            return attr
+        if device.queues is None:
+            attr = Attribute.parse(
+                f"#hal.device.promise<@__device_{device.ordinal}>",
+                self.context,
+            )
+        else:
+            queues = ", ".join(device.queues)
+            attr = Attribute.parse(
+                f"#hal.device.promise<@__device_{device.ordinal}, [{queues}]>",
+                self.context,
+            )
+        self._device_affinity_attr_cache[key] = attr
+        return attr
 
     def create_tensor_global(
         self,
@@ -282,30 +344,22 @@ class ModuleBuilder:
         external, external_scope, external_name = attrs.infer_external_from_tensor(t)
         device = DeviceTensorTrait.get(t)
 
-        # Always create globals at the top. Then after created, if there was
-        # a prior one, move the new one to after it to maintain declaration
-        # order.
-        with InsertionPoint.at_block_begin(self.body), Location.unknown():
+        # Always create globals at the top, after any prior ones to maintain
+        # declaration order.
+        global_ip = self._global_insertion_point()
+        with global_ip, Location.unknown():
             tensor_type = RankedTensorType.get(list(t.shape), element_type)
             ir_attrs = {
                 "sym_name": StringAttr.get(symbol_name),
-                "sym_visibility": StringAttr.get("private"),
+                "sym_visibility": self._private_visibility_attr,
                 "type": TypeAttr.get(tensor_type),
             }
             if attrs.noinline:
-                ir_attrs["noinline"] = UnitAttr.get()
+                ir_attrs["noinline"] = self._unit_attr
             if attrs.mutable:
-                ir_attrs["is_mutable"] = UnitAttr.get()
+                ir_attrs["is_mutable"] = self._unit_attr
             if device:
-                if device.queues is None:
-                    ir_attrs["stream.affinity"] = Attribute.parse(
-                        f"#hal.device.promise<@__device_{device.ordinal}>",
-                    )
-                else:
-                    queues = ", ".join(device.queues)
-                    ir_attrs["stream.affinity"] = Attribute.parse(
-                        f"#hal.device.promise<@__device_{device.ordinal}, [{queues}]>",
-                    )
+                ir_attrs["stream.affinity"] = self._device_affinity_attr(device)
 
             if external:
                 # Emit named external reference.
@@ -331,10 +385,17 @@ class ModuleBuilder:
                 )
             else:
                 # Emit inline initialized.
-                detached_tensor = t.detach().contiguous().cpu()
-                array = np.array(detached_tensor)
-                # We know that a Numpy array is a ReadableBuffer so ignore type error.
-                contents = memoryview(array)  # type: ignore
+                detached_tensor = t.detach()
+                if detached_tensor.device.type != "cpu":
+                    detached_tensor = detached_tensor.cpu()
+                if not detached_tensor.is_contiguous():
+                    detached_tensor = detached_tensor.contiguous()
+                # View the tensor memory directly rather than copying it into a
+                # new array. For file-backed storages (e.g. `torch.load(...,
+                # mmap=True)`) this keeps the blob backed by the mapping so the
+                # OS can page it. We know that a Numpy array is a ReadableBuffer
+                # so ignore type error.
+                contents = memoryview(detached_tensor.numpy())  # type: ignore
                 blob_name = symbol_name
                 elements_attr = DenseResourceElementsAttr.get_from_buffer(
                     contents,
@@ -345,9 +406,7 @@ class ModuleBuilder:
 
             global_op = Operation.create("util.global", attributes=ir_attrs)
             self.symbol_table.insert(global_op)
-            if self.last_global_op is not None:
-                global_op.move_after(self.last_global_op)
-            self.last_global_op = global_op
+            self._order_global(global_op, global_ip)
             actual_symbol_name = StringAttr(global_op.attributes["sym_name"]).value
             return actual_symbol_name, global_op, tensor_type
 
@@ -359,19 +418,19 @@ class ModuleBuilder:
         attrs: GlobalAttributes,
         logical_name: Optional[str] = None,
     ) -> Tuple[str, Operation]:
-        # Always create globals at the top. Then after created, if there was
-        # a prior one, move the new one to after it to maintain declaration
-        # order.
-        with InsertionPoint.at_block_begin(self.body), Location.unknown():
+        # Always create globals at the top, after any prior ones to maintain
+        # declaration order.
+        global_ip = self._global_insertion_point()
+        with global_ip, Location.unknown():
             ir_attrs = {
                 "sym_name": StringAttr.get(symbol_name),
-                "sym_visibility": StringAttr.get("private"),
+                "sym_visibility": self._private_visibility_attr,
                 "type": TypeAttr.get(global_type),
             }
             if attrs.noinline:
-                ir_attrs["noinline"] = UnitAttr.get()
+                ir_attrs["noinline"] = self._unit_attr
             if attrs.mutable:
-                ir_attrs["is_mutable"] = UnitAttr.get()
+                ir_attrs["is_mutable"] = self._unit_attr
             if attrs.uninitialized:
                 # Emit unitialized initial_value to signal that the memory
                 # is valid but has undefined contents.
@@ -386,12 +445,27 @@ class ModuleBuilder:
                 )
             global_op = Operation.create("util.global", attributes=ir_attrs)
             self.symbol_table.insert(global_op)
-            if self.last_global_op is not None:
-                global_op.move_after(self.last_global_op)
-            self.last_global_op = global_op
+            self._order_global(global_op, global_ip)
             actual_symbol_name = StringAttr(global_op.attributes["sym_name"]).value
             return actual_symbol_name, global_op
 
+    def _global_insertion_point(self) -> InsertionPoint:
+        if self._global_ip is not None:
+            return self._global_ip
+        return InsertionPoint.at_block_begin(self.body)
+
+    def _order_global(self, global_op: Operation, ip: InsertionPoint):
+        if self._global_ip is None:
+            if self.last_global_op is not None:
+                # Globals are at the end of the block so there is no op to
+                # insert before: move the new one after the prior one.
+                global_op.move_after(self.last_global_op)
+            elif ip.ref_operation is not None:
+                # First global: subsequent ones are inserted before the op
+                # that followed it, which keeps declaration order.
+                self._global_ip = ip
+        self.last_global_op = global_op
+
     def _create_initial_value_for_type(self, t: IrType) -> Attribute:
         # TODO(#169): Implement something upstream for this (it exists in the C++ API)
         # and use it.
@@ -403,13 +477,9 @@ class ModuleBuilder:
                 )
             element_attr = self._create_initial_value_for_type(rtt.element_type)
             return DenseElementsAttr.get_splat(t, element_attr)
-        if IntegerType.isinstance(t):
-            return IntegerAttr.get(t, 0)
-        if F32Type.isinstance(t) or F64Type.isinstance(t) or F16Type.isinstance(t):
-            # TODO(#170): There should be a common way to check if a FloatType.
-            return FloatAttr.get(t, 0.0)
-        if IndexType.isinstance(t):
-            return IntegerAttr.get(IndexType.get(), 0)
+        factory = _INITIAL_VALUE_FACTORIES.get(t.typeid)
+        if factory is not None:
+            return factory(t)
         raise ValueError(
             f"Cannot create a default initialization value for type {t}",
         )
@@ -421,6 +491,8 @@ class FunctionBuilder:
     __slots__ = [
         "context",
         "func_op",
+        "index_value_cache",
+        "input_types",
         "ip",
         "loc",
         "module_builder",
@@ -437,7 +509,11 @@ class FunctionBuilder:
         self.func_op = func_op
         self.context = func_op.context
         self.ip = InsertionPoint(self.func_op.entry_block)
+        self.input_types: list[IrType] = list(func_op.type.inputs)
         self.return_types: Optional[Sequence[IrType]] = None
+        # Common index constants emitted at `ip`. Since `ip` only ever appends
+        # to the entry block, they dominate everything emitted after them.
+        self.index_value_cache: dict[int, Value] = {}
         self.loc = self.func_op.location
 
     def emit_return(self, *ir_values: Value):
@@ -453,8 +529,7 @@ class FunctionBuilder:
                     )
                 return
             self.return_types = value_types
-            ftype = self.func_op.type
-            ftype = FunctionType.get(ftype.inputs, value_types)
+            ftype = FunctionType.get(self.input_types, value_types)
             self.func_op.attributes["function_type"] = TypeAttr.get(ftype)
             try:
                 self.func_op.verify()
@@ -472,17 +547,28 @@ class FunctionBuilder:
 ###############################################################################
 
 
-def build_index_attribute(value: int) -> IntegerAttr:
-    return IntegerAttr.get(IndexType.get(), value)
+# Index constants common enough to be shared across a whole function.
+SMALL_INDEX_VALUES = frozenset((0, 1, 2, 3, 4, 5, 6, 7, 8, 16, 32, 64))
+
+
+def build_index_attribute(
+    value: int, index_type: Optional[IrType] = None
+) -> IntegerAttr:
+    if index_type is None:
+        index_type = IndexType.get()
+    return IntegerAttr.get(index_type, value)
 
 
 def build_index_value(
     value: int,
     constant_cache: Optional[dict[int, Value]] = None,
+    index_type: Optional[IrType] = None,
 ) -> Value:
     if constant_cache is not None and value in constant_cache:
         return constant_cache[value]
-    index_value = arith_d.ConstantOp(IndexType.get(), value).result
+    if index_type is None:
+        index_type = IndexType.get()
+    index_value = arith_d.ConstantOp(index_type, value).result
     if constant_cache is not None:
         constant_cache[value] = index_value
     return index_value
@@ -492,30 +578,36 @@ def build_tensor_dim_value(
     t: Value,
     dim: int,
     constant_cache: Optional[dict[int, Value]] = None,
+    index_type: Optional[IrType] = None,
 ) -> Value:
-    dim_value = build_index_value(dim, constant_cache=constant_cache)
+    dim_value = build_index_value(
+        dim, constant_cache=constant_cache, index_type=index_type
+    )
     return tensor_d.DimOp(t, dim_value).result
 
 
+_FLOAT_TYPES = frozenset(
+    (
+        BF16Type,
+        F16Type,
+        F32Type,
+        F64Type,
+        Float8E4M3FNType,
+        Float8E4M3FNUZType,
+        Float8E5M2Type,
+        Float8E5M2FNUZType,
+        Float8E8M0FNUType,
+        Float6E2M3FNType,
+        Float4E2M1FNType,
+    )
+)
+
+_INTEGER_LIKE_TYPES = frozenset((IntegerType, IndexType))
+
+
 # API name  inspired by mlir/python/mlir/dialects/_arith_ops_ext.py
 def _is_float_type(type):
-    return isinstance(
-        type,
-        (
-            BF16Type,
-            F16Type,
-            F32Type,
-            F64Type,
-            Float8E4M3FNType,
-            Float8E4M3FNUZType,
-            Float8E5M2Type,
-            Float8E5M2FNUZType,
-            Float8E8M0FNUType,
-            Float8E8M0FNUType,
-            Float6E2M3FNType,
-            Float4E2M1FNType,
-        ),
-    )
+    return type.__class__ in _FLOAT_TYPES
 
 
 def _is_index_type(type):
@@ -523,7 +615,7 @@ def _is_index_type(type):
 
 
 def _is_integer_like_type(type):
-    return isinstance(type, (IntegerType, IndexType))
+    return type.__class__ in _INTEGER_LIKE_TYPES
 
 
 def _is_signed_or_signless_type(type):
@@ -548,16 +640,14 @@ def get_conversion_op(src_elem_type, dst_elem_type, fastmath=None):
         and src_elem_type.width == 1
         and is_dst_float
     ):
+        one_attr = FloatAttr.get(dst_elem_type, 1.0)
+        zero_attr = FloatAttr.get(dst_elem_type, 0.0)
 
         def bool_to_float_select(dst_type, vector_src):
 
             # scalar constants
-            one_const = arith_d.constant(
-                dst_elem_type, FloatAttr.get(dst_elem_type, 1.0)
-            )
-            zero_const = arith_d.constant(
-                dst_elem_type, FloatAttr.get(dst_elem_type, 0.0)
-            )
+            one_const = arith_d.constant(dst_elem_type, one_attr)
+            zero_const = arith_d.constant(dst_elem_type, zero_attr)
 
             # Broadcast to vector if the destination is a vector
             if VectorType.isinstance(dst_type):
@@ -576,29 +666,48 @@ def get_conversion_op(src_elem_type, dst_elem_type, fastmath=None):
         # return caller function for get_conversion op
         return bool_to_float_select
 
-    conversion_ops = {
-        (True, False): arith_d.fptosi,
-        (False, True): arith_d.sitofp,
-    }
+    if (is_src_float and is_dst_float) or (is_src_int and is_dst_int):
+        is_extension = src_elem_type.width < dst_elem_type.width
+    else:
+        is_extension = None
+    return _get_cast_op(is_src_float, is_dst_float, is_extension, fastmath)
+
+
+_CONVERSION_OPS = {
+    (True, False): arith_d.fptosi,
+    (False, True): arith_d.sitofp,
+}
+
+_FLOAT_CAST_OPS = {
+    True: arith_d.extf,
+    False: arith_d.truncf,
+}
 
-    float_cast_ops = {
-        True: arith_d.extf,
-        False: arith_d.truncf,
-    }
+_INT_CAST_OPS = {
+    True: arith_d.extsi,
+    False: arith_d.trunci,
+}
 
-    int_cast_ops = {
-        True: arith_d.extsi,
-        False: arith_d.trunci,
-    }
 
+@lru_cache(maxsize=128)
+def _get_cast_op(
+    is_src_float: bool,
+    is_dst_float: bool,
+    is_extension: Optional[bool],
+    fastmath=None,
+):
+    """
+    Returns the cast op for a conversion. Only depends on the kind of the
+    conversion, so the same callable is shared by all casts of that kind.
+    """
     if is_src_float and is_dst_float:
-        conversion_op = float_cast_ops[src_elem_type.width < dst_elem_type.width]
+        conversion_op = _FLOAT_CAST_OPS[is_extension]
         conversion_op = partial(conversion_op, fastmath=fastmath)
-    elif is_src_int and is_dst_int:
+    elif is_extension is not None:
         # Currently extsi/trunci do not support fast_math option.
-        conversion_op = int_cast_ops[src_elem_type.width < dst_elem_type.width]
+        conversion_op = _INT_CAST_OPS[is_extension]
     else:
-        conversion_op = conversion_ops[(is_src_float, is_dst_float)]
+        conversion_op = _CONVERSION_OPS[(is_src_float, is_dst_float)]
     return conversion_op
 
 
@@ -617,41 +726,62 @@ def attributes_from_argument_device_affinities(
     arguments_count: int,
     context: Context,
 ) -> list[dict[str, Attribute]]:
-    """Get as attributes for function op arguments."""
+    """Get as attributes for function op arguments.
+
+    The returned dicts may be shared between arguments and must not be mutated.
+    """
+    no_attributes: dict[str, Attribute] = {}
     if affinities is None:
-        return [{} for _ in range(arguments_count)]
-    return [
-        (
-            {
+        return [no_attributes] * arguments_count
+    # Arguments on the same device share the parsed affinity attribute.
+    attributes_by_ordinal: dict[int, dict[str, Attribute]] = {}
+    result = []
+    for i in range(arguments_count):
+        affinity = affinities.get(i)
+        if affinity is None:
+            result.append(no_attributes)
+            continue
+        attributes = attributes_by_ordinal.get(affinity.ordinal)
+        if attributes is None:
+            attributes = {
                 "iree.abi.affinity": _attribute_from_device_affinity(
-                    affinities[i],
+                    affinity,
                     context,
                 ),
             }
-            if i in affinities
-            else {}
-        )
-        for i in range(arguments_count)
-    ]
+            attributes_by_ordinal[affinity.ordinal] = attributes
+        result.append(attributes)
+    return result
 
 
 def update_func_op_argument_attributes(
     func_op: func_d.FuncOp,
     attributes: list[dict[str, Attribute]],
 ):
-    if func_d.ARGUMENT_ATTRIBUTE_NAME not in func_op.attributes:
-        mutable_arg_attrs: list[dict[str, Attribute]] = [
-            {} for _ in range(len(func_op.arguments))
-        ]
-    else:
-        mutable_arg_attrs = [
-            {named_attr.name: named_attr.attr for named_attr in dict_attr}
-            for dict_attr in func_op.arg_attrs
-        ]
-
-    for src, dst in zip_longest(attributes, mutable_arg_attrs):
-        dst.update(src)
-
-    func_op.arg_attrs = [
-        DictAttr.get(d, context=func_op.context) for d in mutable_arg_attrs
-    ]
+    context = func_op.context
+    existing_arg_attrs = (
+        list(func_op.arg_attrs)
+        if func_d.ARGUMENT_ATTRIBUTE_NAME in func_op.attributes
+        else None
+    )
+    empty_dict_attr = None
+    arg_attrs = []
+    for i in range(len(func_op.arguments)):
+        new_attrs = attributes[i]
+        if existing_arg_attrs is not None:
+            existing = existing_arg_attrs[i]
+            if not new_attrs:
+                # Nothing to merge, keep the existing attribute as is.
+                arg_attrs.append(existing)
+                continue
+            merged = {named_attr.name: named_attr.attr for named_attr in existing}
+            merged.update(new_attrs)
+            arg_attrs.append(DictAttr.get(merged, context=context))
+        elif new_attrs:
+            arg_attrs.append(DictAttr.get(new_attrs, context=context))
+        else:
+            if empty_dict_attr is None:
+                empty_dict_attr = DictAttr.get({}, context=context)
+            arg_attrs.append(empty_dict_attr)
+
+    func_op.arg_attrs = ArrayAttr.get(arg_attrs, context=context)
@@ -27,6 +27,7 @@ from wave_lang.support.ir_imports import (
 )
 
 from ..ir_utils import (
+    SMALL_INDEX_VALUES,
     build_index_value,
 )
 from .base import (
@@ -72,7 +73,14 @@ def cast_index_value(
 ) -> Value:
     x = unwrap_intrinsic_value(x)
     if isinstance(x, int):
-        return build_index_value(x, constant_cache=constant_cache)
+        trace = current_ir_trace()
+        if constant_cache is None and x in SMALL_INDEX_VALUES:
+            constant_cache = trace.index_value_cache
+        return build_index_value(
+            x,
+            constant_cache=constant_cache,
+            index_type=trace.module_builder.index_type,
+        )
     return x
 
 
@@ -157,7 +165,9 @@ class IREEEmitter:
         """Gets the dimension size of a tensor at a static position."""
         source = cast_tensor_value(source)
         index = cast_static_bounded_index(index, 0, source.rank - 1)
-        dim_value = source.get_dim_value(index)
+        dim_value = source.get_dim_value(
+            index, constant_cache=current_ir_trace().index_value_cache
+        )
         if dtype is not None:
             try:
                 cast_type = TORCH_DTYPE_TO_IREE_TYPE[dtype]()
@@ -21,6 +21,7 @@ from torch.utils._pytree import (
 )
 
 from wave_lang.support.ir_imports import (
+    ArrayAttr,
     DictAttr,
     Location,
     StringAttr,
@@ -86,14 +87,16 @@ class ProcedureTrace(IrTrace):
             argument_ir_types.append(arg.get_ir_type(module_builder))
 
         with loc:
-            argument_attributes = [
-                DictAttr.get(d)
-                for d in attributes_from_argument_device_affinities(
-                    arg_device,
-                    arguments_count=len(argument_ir_types),
-                    context=module_builder.context,
-                )
-            ]
+            argument_attributes = ArrayAttr.get(
+                [
+                    DictAttr.get(d)
+                    for d in attributes_from_argument_device_affinities(
+                        arg_device,
+                        arguments_count=len(argument_ir_types),
+                        context=module_builder.context,
+                    )
+                ]
+            )
             _, func_op = module_builder.create_func_op(
                 symbol_name,
                 argument_ir_types,
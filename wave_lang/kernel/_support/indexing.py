@@ -1,6 +1,15 @@
 from abc import ABC
 from dataclasses import dataclass
-from typing import Any, ClassVar, Optional, Type, TypeAlias, TypeVar, Union
+from typing import (
+    Any,
+    ClassVar,
+    Mapping,
+    Optional,
+    Type,
+    TypeAlias,
+    TypeVar,
+    Union,
+)
 
 import sympy
 
@@ -164,6 +173,21 @@ class IndexingContext:
                 f"{self.subs[sym]}"
             )
 
+    def bind_constants(
+        self, constants: Mapping[IndexSymbol, int | IndexSymbol]
+    ) -> None:
+        """Binds all of `constants` at once. Nothing is bound on conflict."""
+        subs = self.subs
+        if subs:
+            for sym, value in constants.items():
+                existing = subs.get(sym)
+                if existing is not None and existing != value:
+                    raise ValueError(
+                        f"Attempt to bind symbol {sym}={value} conflicts with "
+                        f"previous {existing}"
+                    )
+        subs.update(constants)
+
     def _bind_symbol(self, symbol: IndexSymbol, value: int):
         existing = self.subs.get(symbol)
         if existing is not None and existing != value:
@@ -1,11 +1,17 @@
+import builtins
 import functools
 import inspect
+import itertools
+import threading
 import warnings
+import weakref
 from abc import ABC, abstractmethod
-from types import FunctionType
+from collections.abc import MutableMapping
+from types import FunctionType, MappingProxyType
 from typing import (
     Callable,
-    Dict,
+    Iterator,
+    Mapping,
     Optional,
     Tuple,
     Type,
@@ -82,6 +88,8 @@ class KernelRegionGraph(RegionGraph):
 class KernelBufferProxy(fx.Proxy):
     """Custom proxy for KernelBuffer so that we can override special methods."""
 
+    __slots__ = ("_orig_type", "symbolic_shape", "rank")
+
     def __init__(
         self,
         node: fx.Node,
@@ -94,17 +102,79 @@ class KernelBufferProxy(fx.Proxy):
         self.symbolic_shape = orig_type.symbolic_shape
         self.rank = orig_type.rank
 
+    # Subscripts are emitted directly into the trace, bypassing the op dispatch
+    # through the current context. The op remains the node target.
     def __getitem__(self, key):
-        return ops.kernel_buffer_getitem(self, key)
+        context = _base_context_local.current
+        if context is None or context.eager:
+            return ops.kernel_buffer_getitem(self, key)
+        return context._create_call(ops.kernel_buffer_getitem, self, key)
 
     def __setitem__(self, key, item):
-        ops.kernel_buffer_setitem(self, key, item)
+        context = _base_context_local.current
+        if context is None or context.eager:
+            ops.kernel_buffer_setitem(self, key, item)
+        else:
+            context._create_call(ops.kernel_buffer_setitem, self, key, item)
+
+
+# Kinds of fx node types handled by `KernelTracer.proxy`.
+_SCALAR_KIND = 0  # DataType instance.
+_SYMBOL_BIND_KIND = 1  # SymbolBind subclass.
+_KERNEL_BUFFER_KIND = 2  # KernelBuffer subclass.
+_BUFFER_META_KIND = 3  # Other KernelBufferMeta instance (Memory, Register).
+_OTHER_KIND = 4
+
+# Keyed on identity as kernel buffer types compare equal by shape and dtype
+# regardless of their class. Entries are dropped once the type is collected,
+# since tracing creates index types on the fly.
+_TYPE_KIND_CACHE: dict[int, int] = {}
+
+
+def _classify_node_type(t) -> int:
+    key = id(t)
+    kind = _TYPE_KIND_CACHE.get(key)
+    if kind is None:
+        if isinstance(t, DataType):
+            kind = _SCALAR_KIND
+        elif issubclass(t, SymbolBind):
+            kind = _SYMBOL_BIND_KIND
+        elif isinstance(t, KernelBufferMeta):
+            kind = (
+                _KERNEL_BUFFER_KIND
+                if issubclass(t, KernelBuffer)
+                else _BUFFER_META_KIND
+            )
+        else:
+            kind = _OTHER_KIND
+        _TYPE_KIND_CACHE[key] = kind
+        weakref.finalize(t, _TYPE_KIND_CACHE.pop, key, None)
+    return kind
+
+
+_PASSTHROUGH_ARG_TYPES: Optional[tuple[type, ...]] = None
+
+
+def _get_passthrough_arg_types() -> tuple[type, ...]:
+    global _PASSTHROUGH_ARG_TYPES
+    if _PASSTHROUGH_ARG_TYPES is None:
+        # Cannot import globally due to import cycles
+        from ..wave.constraints import GenericDot
+
+        _PASSTHROUGH_ARG_TYPES = (
+            sympy.Basic,
+            DataType,
+            IndexMapping,
+            GenericDot,
+            FunctionType,
+        )
+    return _PASSTHROUGH_ARG_TYPES
 
 
 class KernelTracer(SubgraphTracer):
     """Custom Tracer for generating a trace of a kernel computation."""
 
-    arg_names: list[str] = []
+    __slots__ = ("arg_names", "current_arg_id")
 
     def __init__(
         self,
@@ -113,68 +183,101 @@ class KernelTracer(SubgraphTracer):
         func: Optional[Callable] = None,
     ):
         super().__init__(region_graph, parent)
+        self.arg_names: tuple[str, ...] = ()
         if func is not None:
-            self.arg_names = inspect.getfullargspec(func).args
-
-    # Property to keep track of current number of arguments.
-    current_arg_id = 0
+            # Read the positional argument names straight off the code object,
+            # unwrapping like fx does when it creates the placeholders.
+            code = getattr(inspect.unwrap(func), "__code__", None)
+            if code is not None:
+                self.arg_names = code.co_varnames[: code.co_argcount]
+            else:
+                self.arg_names = tuple(inspect.getfullargspec(func).args)
+        # Property to keep track of current number of arguments.
+        self.current_arg_id = 0
 
     # Register our custom proxies.
     def proxy(self, node: fx.Node) -> fx.Proxy:
         t = node.type
         if t is not None:
-            # adding metadata for scalar placeholder nodes
-            if isinstance(t, DataType) and node.op == "placeholder":
-                node.meta["arg_id"] = self.current_arg_id
-                node.meta["dtype"] = t
-                node.meta["symbolic_type"] = []
-                self.current_arg_id += 1
-            elif issubclass(t, SymbolBind):
+            kind = _classify_node_type(t)
+            if node.op == "placeholder":
+                if kind != _OTHER_KIND:
+                    # Set arg_id meta to placeholder/argument nodes
+                    # S.T we don't rely on topological order for correct
+                    # argument ordering later on.
+                    node.meta["arg_id"] = self.current_arg_id
+                    # adding metadata for scalar placeholder nodes
+                    if kind == _SCALAR_KIND:
+                        node.meta["dtype"] = t
+                        node.meta["symbolic_type"] = []
+                    elif kind == _SYMBOL_BIND_KIND:
+                        node.meta["symbol_name"] = self.arg_names[self.current_arg_id]
+                        node.meta["dtype"] = t.dtype
+                        node.meta["symbolic_type"] = []
+                    self.current_arg_id += 1
+            else:
                 assert (
-                    node.op == "placeholder"
-                ), "SymbolBind must be a placeholder, got {node.op}"
-                node.meta["arg_id"] = self.current_arg_id
-                node.meta["symbol_name"] = self.arg_names[self.current_arg_id]
-                node.meta["dtype"] = t.dtype
-                node.meta["symbolic_type"] = []
-                self.current_arg_id += 1
-            elif isinstance(t, KernelBufferMeta):
-                # Set arg_id meta to placeholder/argument nodes
-                # S.T we don't rely on topological order for correct
-                # argument ordering later on.
-                node.meta["arg_id"] = self.current_arg_id
-                self.current_arg_id += 1
-            if not isinstance(t, DataType) and issubclass(t, KernelBuffer):
+                    kind != _SYMBOL_BIND_KIND
+                ), f"SymbolBind must be a placeholder, got {node.op}"
+            if kind == _KERNEL_BUFFER_KIND:
                 return KernelBufferProxy(node, self, t)
         return super().proxy(node)
 
     def create_arg(self, a):
-        # Cannot import globally due to import cycles
-        from ..wave.constraints import GenericDot
-
-        # Let IndexExpr persist as arguments.
-        if isinstance(a, sympy.Basic):
-            return a
-        # Let DataType persist as arguments.
-        if isinstance(a, DataType):
-            return a
-        if isinstance(a, IndexMapping):
-            return a
-        if isinstance(a, GenericDot):
-            return a
-        if isinstance(a, FunctionType):
+        # Let IndexExpr, DataType, IndexMapping, GenericDot and functions
+        # persist as arguments.
+        # GenericDot is imported lazily (import cycle) on the first call only.
+        if isinstance(a, _PASSTHROUGH_ARG_TYPES or _get_passthrough_arg_types()):
             return a
         return super().create_arg(a)
 
 
+class _RootSubgraphMap(MutableMapping[str, fx.Graph]):
+    """
+    Live view of the subgraphs of a region graph, excluding the root graph.
+
+    Stored on the root graph so that nodes can find their subgraphs. Changes
+    through either this view or `CapturedTrace.add_subgraph` are visible to
+    both.
+    """
+
+    __slots__ = ("_subgraphs", "_root_graph")
+
+    def __init__(self, subgraphs: dict[str, fx.Graph], root_graph: str):
+        self._subgraphs = subgraphs
+        self._root_graph = root_graph
+
+    def __getitem__(self, name: str) -> fx.Graph:
+        if name == self._root_graph:
+            raise KeyError(name)
+        return self._subgraphs[name]
+
+    def __setitem__(self, name: str, graph: fx.Graph):
+        if name == self._root_graph:
+            raise KeyError(f"Cannot replace the root graph {name}")
+        self._subgraphs[name] = graph
+
+    def __delitem__(self, name: str):
+        if name == self._root_graph:
+            raise KeyError(name)
+        del self._subgraphs[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._subgraphs if name != self._root_graph)
+
+    def __len__(self) -> int:
+        return len(self._subgraphs) - (self._root_graph in self._subgraphs)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
 class CapturedTrace:
     def __init__(self, region_graph: RegionGraph, root_graph: str):
         self.region_graph = region_graph
         self.root_graph = root_graph
-        self.region_graph.subgraphs[root_graph].subgraphs = {}
-        for name, subgraph in self.region_graph.subgraphs.items():
-            if name != root_graph:
-                self.region_graph.subgraphs[root_graph].subgraphs[name] = subgraph
+        subgraphs = self.region_graph.subgraphs
+        subgraphs[root_graph].subgraphs = _RootSubgraphMap(subgraphs, root_graph)
 
     def get_subgraph(self, name: str) -> fx.Graph:
         return self.region_graph.subgraphs[name]
@@ -185,13 +288,23 @@ class CapturedTrace:
     def get_root_graph(self) -> fx.Graph:
         return self.get_subgraph(self.root_graph)
 
+    def iwalk(
+        self, filter: Optional[Callable[[fx.Node], bool]] = None
+    ) -> Iterator[fx.Node]:
+        """
+        Lazily yields the nodes of all subgraphs, optionally filtered. Prefer
+        this over `walk` when only a prefix of the nodes is consumed and the
+        graph is not modified while iterating.
+        """
+        nodes = itertools.chain.from_iterable(
+            region.nodes for region in self.region_graph.subgraphs.values()
+        )
+        if filter is None:
+            return nodes
+        return builtins.filter(filter, nodes)
+
     def walk(self, filter: Optional[Callable[[fx.Node], bool]] = None) -> list[fx.Node]:
-        nodes: list[fx.Node] = []
-        for region in self.region_graph.subgraphs.values():
-            for node in region.nodes:
-                if filter is None or filter(node):
-                    nodes.append(node)
-        return nodes
+        return list(self.iwalk(filter))
 
 
 ###############################################################################
@@ -201,8 +314,30 @@ class CapturedTrace:
 ###############################################################################
 
 
+# Shared by proxies created without keyword arguments. Never mutated: fx copies
+# the kwargs into the node.
+_EMPTY_KWARGS: dict = {}
+
+
+class _BaseContextLocal(threading.local):
+    """
+    Innermost active BaseContext of the current thread, mirrored from the
+    context stack so that primitive calls can reach it with a single
+    attribute read.
+    """
+
+    current: Optional["BaseContext"] = None
+
+    def __init__(self):
+        self.outer: list[Optional["BaseContext"]] = []
+
+
+_base_context_local = _BaseContextLocal()
+
+
 class BaseContext(OpDispatcher):
     __tk_context_idname__ = "ExecutionContext"
+    __slots__ = ("eager",)
 
     def __init__(self, *, eager: bool):
         self.eager = eager
@@ -213,14 +348,22 @@ class BaseContext(OpDispatcher):
 
     def __enter__(self) -> "BaseContext":
         context.push(OpDispatcher, self)
-        return context.push(BaseContext, self)
+        context.push(BaseContext, self)
+        local = _base_context_local
+        local.outer.append(local.current)
+        local.current = self
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         context.pop(OpDispatcher, self)
         context.pop(BaseContext, self)
+        local = _base_context_local
+        local.current = local.outer.pop()
 
 
 class EagerContext(BaseContext):
+    __slots__ = ("rank", "current_thread")
+
     def __init__(self, rank: int = 0):
         super().__init__(eager=True)
         self.rank = rank
@@ -237,21 +380,44 @@ class EagerContext(BaseContext):
         kernel_buffer._tensor.__setitem__(key, item)
 
 
+@functools.lru_cache(maxsize=None)
+def _thread_types_for(grid_type: Type[Grid]) -> tuple[Type[Index], ...]:
+    return tuple(
+        backed_sym_index_type(BoundedRelation(0, n, upper_inclusive=False))
+        for n in grid_type.symbolic_shape
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _handler_method_names(cls: type) -> tuple[str, ...]:
+    return tuple(name for name in dir(cls) if name.startswith("handle_"))
+
+
 class CompiledContext(BaseContext):
+    __slots__ = ("region_graph", "grid_type", "current_thread_types", "_dispatch")
+
     def __init__(self, region_graph: RegionGraph, *, grid_type: Type[Grid]):
         super().__init__(eager=False)
         self.region_graph = region_graph
         self.grid_type = grid_type
-        self.current_thread_types = [
-            backed_sym_index_type(BoundedRelation(0, n, upper_inclusive=False))
-            for n in grid_type.symbolic_shape
-        ]
+        self.current_thread_types = _thread_types_for(grid_type)
+        # Handlers keyed by op name, resolved once instead of on every
+        # dispatch. Custom op handlers override the handle_* methods.
+        self._dispatch: dict[str, Callable] = {
+            name[len("handle_") :]: getattr(self, name)
+            for name in _handler_method_names(type(self))
+        }
+
+    def get_handler(self, idname: str) -> Optional[Callable]:
+        return self._dispatch.get(idname)
 
     def register_custom_op(self, name: str, op: CustomOp):
-        def handler(*args, **kwargs):
-            return op.handle(self.region_graph, *args, **kwargs)
+        self._dispatch[name] = functools.partial(op.handle, self.region_graph)
 
-        setattr(self, f"handle_{name}", handler)
+    def _create_call(self, op, *args) -> fx.Proxy:
+        return self.region_graph.create_proxy(
+            "call_function", target=op, args=args, kwargs=_EMPTY_KWARGS
+        )
 
     ### ========================================================================
     ### Core Operations
@@ -274,47 +440,22 @@ class CompiledContext(BaseContext):
         return proxy
 
     def handle_to_dtype(self, op, val, dtype):
-        return self.region_graph.create_proxy(
-            "call_function",
-            op,
-            args=(val, dtype),
-            kwargs={},
-        )
+        return self._create_call(op, val, dtype)
 
     def handle_kernel_buffer_getitem(self, op, kernel_buffer: KernelBuffer, key):
-        return self.region_graph.create_proxy(
-            "call_function",
-            op,
-            args=(kernel_buffer, key),
-            kwargs={},
-        )
+        return self._create_call(op, kernel_buffer, key)
 
     def handle_kernel_buffer_setitem(self, op, kernel_buffer: KernelBuffer, key, item):
-        self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(kernel_buffer, key, item),
-            kwargs={},
-        )
+        self._create_call(op, kernel_buffer, key, item)
 
     ### ========================================================================
     ### Memory Operations
     ### ========================================================================
     def handle_kernel_buffer_load(self, op, kernel_buffer, multi_index, shape):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(kernel_buffer, multi_index, shape),
-            kwargs={},
-        )
+        return self._create_call(op, kernel_buffer, multi_index, shape)
 
     def handle_kernel_buffer_store(self, op, kernel_buffer, multi_index, item):
-        self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(kernel_buffer, multi_index, item),
-            kwargs={},
-        )
+        self._create_call(op, kernel_buffer, multi_index, item)
 
     ### ========================================================================
     ### Control Flow Operations
@@ -330,16 +471,17 @@ class CompiledContext(BaseContext):
         def wrapper(f):
             with self.region_graph.subtracer() as subtracer:
                 subgraph_name, implicit_capture = subtracer.trace(f)
-            # Create a call to this subgraph
+            # Create a call to this subgraph. The implicit captures are omitted
+            # when the body has none.
+            kwargs = {"subgraph": subgraph_name}
+            if implicit_capture:
+                kwargs["implicit_capture"] = implicit_capture
             ret = self.region_graph.create_proxy(
                 "call_function",
                 target=op,
                 name="for_loop",
                 args=(start, stop, step, init_args),
-                kwargs={
-                    "subgraph": subgraph_name,
-                    "implicit_capture": implicit_capture,
-                },
+                kwargs=kwargs,
             )
             return ret
 
@@ -349,100 +491,39 @@ class CompiledContext(BaseContext):
     ### Math Operations
     ### ========================================================================
     def handle_exp2(self, op, val):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(val,),
-            kwargs={},
-        )
+        return self._create_call(op, val)
 
     def handle_vector_constant(
         self, op, shape: Tuple[int, ...], dtype, value: int | float
     ):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(shape, dtype, value),
-            kwargs={},
-        )
+        return self._create_call(op, shape, dtype, value)
 
     ### ========================================================================
     ### Reduction Operations
     ### ========================================================================
     def handle_vector_max(self, op, vector, axis=None, acc=None):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(vector, axis, acc),
-            kwargs={},
-        )
+        return self._create_call(op, vector, axis, acc)
 
     def handle_vector_sum(self, op, vector, axis=None, acc=None):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(vector, axis, acc),
-            kwargs={},
-        )
+        return self._create_call(op, vector, axis, acc)
 
     def handle_vector_dot(self, op, lhs, rhs, acc=None):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(lhs, rhs, acc),
-            kwargs={},
-        )
+        return self._create_call(op, lhs, rhs, acc)
 
     ### ========================================================================
     ### Shape Manipulation Operations
     ### ========================================================================
     def handle_vector_broadcast(self, op, vector, leading_sizes):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(vector, leading_sizes),
-            kwargs={},
-        )
+        return self._create_call(op, vector, leading_sizes)
 
     def handle_vector_broadcast_in_dim(self, op, vector, shape, broadcast_dimensions):
-        # Currently, we do not have a corressponding op in MLIR, so
-        # we trace this to broadcast + transpose.
+        # Traced as a single node. Currently, we do not have a corressponding
+        # op in MLIR, so codegen lowers it to broadcast + transpose.
         # TODO: Add a vector dialect op for this in MLIR.
-
-        # Remove broadcast_dimensions from shape.
-        shape_with_leading = tuple(
-            dim for i, dim in enumerate(shape) if i not in broadcast_dimensions
-        )
-
-        # Broadcast
-        broadcasted_vector = self.region_graph.create_proxy(
-            "call_function",
-            target=ops.vector_broadcast,
-            args=(vector, shape_with_leading),
-            kwargs={},
-        )
-
-        # Get the permutation for the transpose.
-        permutation = tuple(
-            i for i in range(len(shape)) if i not in broadcast_dimensions
-        )
-        permutation = permutation + tuple(broadcast_dimensions)
-
-        # Transpose
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=ops.vector_transpose,
-            args=(broadcasted_vector, permutation),
-            kwargs={},
-        )
+        return self._create_call(op, vector, shape, broadcast_dimensions)
 
     def handle_vector_transpose(self, op, vector, permutation):
-        return self.region_graph.create_proxy(
-            "call_function",
-            target=op,
-            args=(vector, permutation),
-            kwargs={},
-        )
+        return self._create_call(op, vector, permutation)
 
 
 ###############################################################################
@@ -471,13 +552,18 @@ class Launchable(ABC):
     def test_execute(self, args, kwargs): ...
 
 
+_NO_CONSTANT_BINDINGS: Mapping[IndexSymbol, int | IndexSymbol] = MappingProxyType({})
+
+
 class LaunchContext(ABC):
     __tk_context_idname__ = "ExecutionContext"
 
     def __init__(
-        self, constant_bindings: Dict[IndexSymbol, int | IndexSymbol] = {}, **kwargs
+        self,
+        constant_bindings: Optional[Mapping[IndexSymbol, int | IndexSymbol]] = None,
+        **kwargs,
     ):
-        self.constant_bindings = constant_bindings
+        self.constant_bindings = constant_bindings or _NO_CONSTANT_BINDINGS
         self.kwargs = kwargs
 
     @staticmethod
@@ -498,8 +584,8 @@ class LaunchContext(ABC):
         # correct layering?
         idxc = IndexingContext()
         context.push(IndexingContext, idxc)
-        for s, val in self.constant_bindings.items():
-            idxc.bind_constant(s, val)
+        if self.constant_bindings:
+            idxc.bind_constants(self.constant_bindings)
         return context.push(LaunchContext, self)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -529,7 +615,9 @@ class AOTLaunchContext(LaunchContext):
     module: Operation
 
     def __init__(
-        self, module: Operation, constant_bindings: Dict[IndexSymbol, int] = {}
+        self,
+        module: Operation,
+        constant_bindings: Optional[Mapping[IndexSymbol, int]] = None,
     ):
         self.module = module
         super().__init__(constant_bindings)
@@ -564,7 +652,7 @@ def custom_primitive_fn(
 
     @functools.wraps(f)
     def wrapper(*args, **kwargs):  # type: ignore
-        context = BaseContext.current()
+        context = _base_context_local.current or BaseContext.current()
         if context.eager:
             return f(*args, **kwargs)
         else:
@@ -635,7 +635,7 @@ def _(emitter: ThreadEmitter, node: fx.Node):
     try:
         start, end, step, init_args = node.args
         subgraph = node.kwargs["subgraph"]
-        implicit_capture = node.kwargs["implicit_capture"]
+        implicit_capture = node.kwargs.get("implicit_capture", ())
     except ValueError as e:
         raise ValidationError("Malformed arguments") from e
 
@@ -698,6 +698,18 @@ def _(emitter: ThreadEmitter, node: fx.Node):
 ###############################################################################
 
 
+def _emit_broadcast(vector: Value, leading_sizes) -> Value:
+    broadcasted_shape = list(leading_sizes) + vector.type.shape
+    broadcasted_type = VectorType.get(broadcasted_shape, vector.type.element_type)
+    return vector_d.broadcast(broadcasted_type, vector)
+
+
+def _emit_transpose(vector: Value, permutation) -> Value:
+    new_shape = [vector.type.shape[i] for i in permutation]
+    result_type = VectorType.get(new_shape, vector.type.element_type)
+    return vector_d.transpose(result_type, vector, permutation)
+
+
 @handle_op(tkl.broadcast)
 def _(emitter: ThreadEmitter, node: fx.Node):
     try:
@@ -707,11 +719,34 @@ def _(emitter: ThreadEmitter, node: fx.Node):
 
     vector = cast_vector(emitter, vector)
     leading_sizes = cast_py_literal(emitter, leading_sizes)
+    result = _emit_broadcast(vector, leading_sizes)
+    emitter.bind_node_proxy(node, IRProxyValue(result))
 
-    old_shape = vector.type.shape
-    broadcasted_shape = list(leading_sizes) + old_shape
-    broadcasted_type = VectorType.get(broadcasted_shape, vector.type.element_type)
-    result = vector_d.broadcast(broadcasted_type, vector)
+
+@handle_op(tkl.broadcast_in_dim)
+def _(emitter: ThreadEmitter, node: fx.Node):
+    try:
+        vector, shape, broadcast_dimensions = node.args
+    except ValueError as e:
+        raise ValidationError("Malformed arguments") from e
+
+    vector = cast_vector(emitter, vector)
+    shape = cast_py_literal(emitter, shape)
+    broadcast_dimensions = tuple(cast_py_literal(emitter, broadcast_dimensions))
+
+    # There is no vector dialect op for this, so emit a broadcast + transpose.
+    # Split shape into the dimensions that are not broadcast_dimensions (and
+    # become the leading sizes of the broadcast) and their permutation indices.
+    broadcast_dims_set = set(broadcast_dimensions)
+    shape_with_leading = []
+    permutation = []
+    for i, dim in enumerate(shape):
+        if i not in broadcast_dims_set:
+            shape_with_leading.append(dim)
+            permutation.append(i)
+    permutation = tuple(permutation) + broadcast_dimensions
+
+    result = _emit_transpose(_emit_broadcast(vector, shape_with_leading), permutation)
     emitter.bind_node_proxy(node, IRProxyValue(result))
 
 
@@ -724,10 +759,7 @@ def _(emitter: ThreadEmitter, node: fx.Node):
 
     vector = cast_vector(emitter, vector)
     permutation = cast_py_literal(emitter, permutation)
-    new_shape = [vector.type.shape[i] for i in permutation]
-    result_type = VectorType.get(new_shape, vector.type.element_type)
-
-    result = vector_d.transpose(result_type, vector, permutation)
+    result = _emit_transpose(vector, permutation)
     emitter.bind_node_proxy(node, IRProxyValue(result))
 
 
@@ -1,7 +1,7 @@
 """Support for defining the op library and dispatch."""
 
 import functools
-from typing import Type, TypeVar
+from typing import Callable, Optional, Type, TypeVar
 
 from .._support import context
 
@@ -17,6 +17,7 @@ class OpDispatcher:
     """
 
     __tk_context_idname__ = "OpDispatcher"
+    __slots__ = ()
 
     @classmethod
     def current(cls: Type[OpDispatcherT]) -> OpDispatcherT:
@@ -28,6 +29,10 @@ class OpDispatcher:
     def __exit__(self, exc_type, exc_val, exc_tb):
         context.pop(OpDispatcher, self)
 
+    def get_handler(self, idname: str) -> Optional[Callable]:
+        """Returns the handler for `idname` or None if not registered."""
+        return getattr(self, f"handle_{idname}", None)
+
 
 def define_op(f: T) -> T:
     idname = f.__name__
@@ -35,9 +40,8 @@ def define_op(f: T) -> T:
     @functools.wraps(f)
     def wrapped(*args, **kwargs):
         dispatcher = OpDispatcher.current()
-        try:
-            handler = getattr(dispatcher, f"handle_{idname}")
-        except AttributeError:
+        handler = dispatcher.get_handler(idname)
+        if handler is None:
             raise AttributeError(
                 f"The current OpDispatcher ({dispatcher}) does not register a handler for {idname}"
             )
@@ -316,9 +316,8 @@ def define_op(op_name: str) -> Callable[[T], T]:
 
         def new_function(*args: Any, **kwargs: dict[str, Any]):
             dispatcher = OpDispatcher.current()
-            try:
-                handler = getattr(dispatcher, f"handle_{op_name}")
-            except AttributeError:
+            handler = dispatcher.get_handler(op_name)
+            if handler is None:
                 raise AttributeError(
                     f"The current OpDispatcher ({dispatcher}) does not register a handler for {op_name}"
                 )
@@ -372,10 +371,7 @@ def define_py_op(py_op: Callable) -> Callable[[T], T]:
                 handler = original_handler
 
             if dispatcher:
-                try:
-                    handler = getattr(dispatcher, f"handle_{op_name}")
-                except AttributeError:
-                    handler = original_handler
+                handler = dispatcher.get_handler(op_name) or original_handler
 
             return handler(*args, **kwargs)
 
@@ -420,9 +416,8 @@ def define_interface_op(op_name: str) -> Callable[[T], T]:
 
         def new_function(*args: Any, **kwargs: dict[str, Any]):
             dispatcher = OpDispatcher.current()
-            try:
-                handler = getattr(dispatcher, f"handle_{op_name}")
-            except AttributeError:
+            handler = dispatcher.get_handler(op_name)
+            if handler is None:
                 raise AttributeError(
                     f"The current OpDispatcher ({dispatcher}) does not register a handler for {op_name}"
                 )
@@ -22,6 +22,7 @@ from wave_lang.support.ir_imports import (
     AffineExpr,
     AffineMap,
     Attribute,
+    Block,
     DenseElementsAttr,
     FloatAttr,
     IndexType,
@@ -77,6 +78,16 @@ class WaveEmitter:
     def __post_init__(self):
         self.ip = InsertionPoint(self.root_sig.entry_block)
         self.dynamic_symbols = self.options.dynamic_symbols
+        # Strides per symbolic shape, with their IR values per insertion block.
+        self._stride_cache: dict[tuple, tuple[list, dict[Block, list[Value]]]] = {}
+        # Scalar constants per (insertion block, type, value).
+        self._const_cache: dict[tuple[Block, IrType, Any], Value] = {}
+        # Workgroup index values, linearized and buffer-cast memrefs per
+        # insertion block.
+        self._wg_index_cache: dict[tuple[Block, IndexExpr], Value] = {}
+        self._memref_cast_cache: dict[tuple, Value] = {}
+        # Memory side index expressions of read/write mappings.
+        self._index_mapping_cache: dict[tuple, tuple[IndexExpr, ...]] = {}
 
     def emit_program_invariants(self):
         grid_type = self.grid_type
@@ -14,6 +14,7 @@ from wave_lang.support.ir_imports import (
     Attribute,
     DenseElementsAttr,
     IndexType,
+    InsertionPoint,
     IntegerAttr,
     IntegerType,
     IrType,
@@ -25,13 +26,20 @@ from wave_lang.support.ir_imports import (
     amdgpu_d,
     arith_d,
     memref_d,
+    scf_d,
     vector_d,
 )
 from wave_lang.aot.support.ir_utils import (
     _is_float_type,
 )
 
-from ..._support.indexing import IndexExpr, IndexingContext, IndexSequence, IndexSymbol
+from ..._support.indexing import (
+    IndexExpr,
+    IndexingContext,
+    IndexSequence,
+    IndexSymbol,
+    index_symbol,
+)
 from ...compiler.base import ValidationError
 from ...compiler.builder import IRProxyValue
 from ...compiler.utils import strides_from_symbolic_shape
@@ -74,27 +82,37 @@ def _get_start_index(i: IndexSequence | IndexExpr) -> IndexExpr:
 def _get_start_indices(
     src_indices: dict[IndexExpr, IndexSequence | IndexExpr],
 ) -> list[IndexExpr]:
-    start_indices = []
-    for dim_indexing in src_indices:
-        i = _get_start_index(src_indices[dim_indexing])
-        start_indices.append(i)
+    return [
+        i.start if isinstance(i, IndexSequence) else i for i in src_indices.values()
+    ]
+
 
-    return start_indices
+_WG_ZERO_SUBS = {WORKGROUP_0: 0, WORKGROUP_1: 0, WORKGROUP_2: 0}
+_WG_SYMS = frozenset(_WG_ZERO_SUBS)
 
 
+@functools.lru_cache(maxsize=4096)
 def _split_index(src: IndexExpr | int) -> tuple[IndexExpr, IndexExpr]:
     """
     Split index expr into thread-dependent and thread-independent parts
     """
-    subs_wg = {WORKGROUP_0: 0, WORKGROUP_1: 0, WORKGROUP_2: 0}
+    # Without wg symbols the entire index is thread dependent.
+    if not isinstance(src, sympy.Basic) or src.free_symbols.isdisjoint(_WG_SYMS):
+        return sympy.sympify(0), src
+
     # Replace all wg symbols with 0s to get thread-dependent index.
     # All dynamic values will also be part of thread-index.
-    thread_dependent_index = safe_subs(src, subs_wg)
+    thread_dependent_index = safe_subs(src, _WG_ZERO_SUBS)
 
     # Compute thread-independent index as `orig_index - thread_dependent_index`
     # All thread symbols and dynamic should cancel-out in the result.
-    thread_independent_index = sympy.simplify(src - thread_dependent_index)
-    if thread_independent_index.free_symbols - set(subs_wg.keys()):
+    # Index expressions are mostly affine in the wg symbols, for which expand
+    # is enough; only fall back to the much slower simplify when it is not.
+    diff = src - thread_dependent_index
+    thread_independent_index = sympy.expand(diff)
+    if thread_independent_index.free_symbols - _WG_SYMS:
+        thread_independent_index = sympy.simplify(diff)
+    if thread_independent_index.free_symbols - _WG_SYMS:
         # If we have any symbols besides wg symbols, means some thread or
         # dynamic symbols were not canceled out, use the entire index as
         # thread dependent index.
@@ -104,17 +122,39 @@ def _split_index(src: IndexExpr | int) -> tuple[IndexExpr, IndexExpr]:
     return thread_independent_index, thread_dependent_index
 
 
+def _gen_wg_index(
+    emitter: WaveEmitter, subs: dict[IndexSymbol, Value], expr: IndexExpr
+) -> Value:
+    """
+    Workgroup parts of indices only depend on the workgroup ids, so the same
+    expression is materialized once per insertion block. This also lets
+    accesses with equal workgroup offsets share their linearized memref.
+    """
+    key = (InsertionPoint.current.block, expr)
+    value = emitter._wg_index_cache.get(key)
+    if value is None:
+        value = emitter._wg_index_cache[key] = gen_sympy_index(subs, expr)
+    return value
+
+
 def _build_start_indices(
     emitter: WaveEmitter,
     src_indices: dict[IndexExpr, IndexSequence | IndexExpr],
     dynamic_values: dict[IndexExpr, Any] = {},
+    subs: Optional[dict[IndexSymbol, Value]] = None,
 ) -> tuple[list[OpResult], list[OpResult], list[OpResult]]:
     start_indices = _get_start_indices(src_indices)
-    split_indices = [_split_index(i) for i in start_indices]
-    subs = add_emitter_subs(emitter, dynamic_values)
+    wg_exprs, th_exprs = [], []
+    for i in start_indices:
+        wg, th = _split_index(i)
+        wg_exprs.append(wg)
+        th_exprs.append(th)
+
+    if subs is None:
+        subs = add_emitter_subs(emitter, dynamic_values)
     indices = [gen_sympy_index(subs, i) for i in start_indices]
-    indices_wg = [gen_sympy_index(subs, i[0]) for i in split_indices]
-    indices_th = [gen_sympy_index(subs, i[1]) for i in split_indices]
+    indices_wg = [_gen_wg_index(emitter, subs, i) for i in wg_exprs]
+    indices_th = [gen_sympy_index(subs, i) for i in th_exprs]
 
     return indices, indices_wg, indices_th
 
@@ -123,6 +163,36 @@ def _compute_offset(indices: list[IndexExpr], strides: list[IndexExpr]) -> Index
     return sum(i * s for i, s in zip(indices, strides))
 
 
+def _lookup_strides(
+    emitter: WaveEmitter, symbolic_shape: tuple[IndexExpr, ...]
+) -> tuple[list[IndexExpr], dict]:
+    key = tuple(symbolic_shape)
+    entry = emitter._stride_cache.get(key)
+    if entry is None:
+        strides = strides_from_symbolic_shape(
+            IndexingContext.current(), key, allow_mixed_shapes=True
+        )
+        entry = emitter._stride_cache[key] = (strides, {})
+    return entry
+
+
+def _get_strides(
+    emitter: WaveEmitter, symbolic_shape: tuple[IndexExpr, ...]
+) -> tuple[list[IndexExpr], list[Value]]:
+    """
+    Returns the strides of `symbolic_shape` and their IR values. The values are
+    materialized once per insertion block, so they dominate every later use in
+    that block.
+    """
+    strides, values_per_block = _lookup_strides(emitter, symbolic_shape)
+    block = InsertionPoint.current.block
+    values = values_per_block.get(block)
+    if values is None:
+        subs = add_emitter_subs(emitter)
+        values = values_per_block[block] = [gen_sympy_index(subs, s) for s in strides]
+    return strides, values
+
+
 def _get_symbolic_shape(node: fx.Node) -> tuple[IndexExpr]:
     return get_custom(node).type.symbolic_shape
 
@@ -132,6 +202,7 @@ def _build_mask(
     index: dict[IndexExpr, IndexExpr],
     elements_per_thread: int,
     bounds: Optional[dict[IndexSymbol, IndexExpr]],
+    subs: Optional[dict[IndexSymbol, Value]] = None,
 ) -> Optional[OpResult]:
     if not bounds:
         return None
@@ -141,21 +212,50 @@ def _build_mask(
     last_dim = list(index)[fastest_dim]
     new_index = {k: _get_start_index(v) for k, v in index.items()}
 
-    new_index[last_dim] = new_index[last_dim] + idxc.iota(elements_per_thread)
+    mask_vec_type = VectorType.get([elements_per_thread], IntegerType.get_signless(1))
 
-    mask_expr = functools.reduce(
-        lambda a, b: sympy.And(a, b),
-        (new_index[dim] < bound for dim, bound in bounds.items()),
-    )
-    mask = gen_sympy_index(add_emitter_subs(emitter), mask_expr)
+    # Drop bounds which hold for the whole vector and bail out early if one of
+    # them fails for the whole vector. Only the fastest dim varies across the
+    # vector, so it is enough to check its first and last elements.
+    conds = []
+    for dim, bound in bounds.items():
+        first = sympy.sympify(new_index[dim])
+        last = first + (elements_per_thread - 1) if dim == last_dim else first
+        if subs_idxc(last < bound) == sympy.true:
+            continue
+        if subs_idxc(first < bound) == sympy.false:
+            return _get_splat_const(mask_vec_type, 0)
+        if dim == last_dim:
+            first = first + idxc.iota(elements_per_thread)
+        conds.append(first < bound)
+
+    if not conds:
+        return None
+
+    mask_expr = conds[0] if len(conds) == 1 else sympy.And(*conds)
+    if subs is None:
+        subs = add_emitter_subs(emitter)
+    mask = gen_sympy_index(subs, mask_expr)
 
-    mask_vec_type = VectorType.get([elements_per_thread], IntegerType.get_signless(1))
     if mask.type != mask_vec_type:
         mask = vector_d.broadcast(mask_vec_type, mask)
 
     return mask
 
 
+def _emit_const(emitter: WaveEmitter, type: IrType, value: Any) -> Value:
+    """
+    Returns a scalar `arith.constant`, reusing the one already emitted in the
+    current insertion block.
+    """
+    key = (InsertionPoint.current.block, type, value)
+    const = emitter._const_cache.get(key)
+    if const is None:
+        const = arith_d.constant(type, get_constant_attr(value, type))
+        emitter._const_cache[key] = const
+    return const
+
+
 def _get_splat_const(vec_type: IrType, value: Any) -> Value:
     splat = DenseElementsAttr.get_splat(
         vec_type, get_constant_attr(value, vec_type.element_type)
@@ -167,21 +267,110 @@ def _constant_mask(vec_type: IrType) -> Value:
     return _get_splat_const(vec_type, 1)
 
 
-def _construct_gather_scatter_indices(
-    emitter: WaveEmitter,
-    symbolic_shape: tuple[IndexExpr],
-    index: tuple[IndexExpr],
-    mapping: IndexMapping,
+def _is_all_ones_mask(mask: Value) -> bool:
+    """
+    Returns True if `mask` is a constant with every lane set.
+    """
+    if not isinstance(mask, OpResult):
+        return False
+
+    op = mask.owner.opview
+    if isinstance(op, vector_d.ConstantMaskOp):
+        return list(op.mask_dim_sizes) == VectorType(mask.type).shape
+
+    if isinstance(op, arith_d.ConstantOp):
+        value = op.value
+        if not DenseElementsAttr.isinstance(value):
+            return IntegerAttr(value).value != 0
+        value = DenseElementsAttr(value)
+        return value.is_splat and IntegerAttr(value.get_splat_value()).value != 0
+
+    return False
+
+
+# Element position along the fastest dim, used to derive all gather/scatter
+# offsets from a single substitution.
+_ELEM_IDX = index_symbol("$GATHER_SCATTER_ELEM")
+
+
+def _get_const_offsets(
+    index_mapping: tuple[IndexExpr, ...],
+    iters: list[IndexSymbol],
+    start_indices: list[IndexExpr],
+    start_indices_orig: list[IndexExpr],
+    fastest_dim: int,
+    strides: list[IndexExpr],
     elements_per_thread: int,
+) -> tuple[Optional[list[int]], bool]:
+    """
+    Returns the offsets of each vector element relative to `start_indices`,
+    or None if they are not compile-time constants, and whether they are just
+    `0, 1, ..., n - 1`, i.e. a contiguous access.
+    """
+    start_indices_offset = _compute_offset(start_indices, strides)
+
+    def offset_at(i):
+        # Update fastest dim, i.e. in case of identity mapping it will
+        # be equivalent to just vector.load
+        subs = [(sym, idx) for sym, idx in zip(iters, start_indices_orig)]
+        subs[fastest_dim] = (subs[fastest_dim][0], start_indices_orig[fastest_dim] + i)
+        indices = [m.subs(subs) for m in index_mapping]
+
+        # First, we build indices as if resulting gather/scatter `start_indices`
+        # are 0 as mapping expression may depend on absolute value of index
+        # (e.g. `index % 32`). Then we adjust for the non-0 `start_indices` by
+        # subtracting computed previously linear `start_indices_offset`. For
+        # simple cases like transpose, the resulting expression should fold into
+        # simple constant while more complex expressions may requires actual
+        # arith ops on dynamic values.
+        offset = sympy.sympify(_compute_offset(indices, strides) - start_indices_offset)
+        return offset if offset.is_number else subs_idxc(offset)
+
+    # Most mappings are affine in the element position, in which case all the
+    # offsets follow from a single substitution.
+    offset = sympy.expand(offset_at(_ELEM_IDX))
+    if offset.free_symbols <= {_ELEM_IDX} and offset.is_polynomial(_ELEM_IDX):
+        coeffs = sympy.Poly(offset, _ELEM_IDX).all_coeffs()
+        if len(coeffs) <= 2 and all(c.is_Integer for c in coeffs):
+            delta, base = [0, *coeffs][-2:]
+            offsets = [int(base + i * delta) for i in range(elements_per_thread)]
+            is_identity = base == 0 and (delta == 1 or elements_per_thread == 1)
+            return offsets, is_identity
+
+    offsets = []
+    is_identity = True
+    for i in range(elements_per_thread):
+        offset = offset_at(i)
+        if not offset.is_number:
+            return None, False
+
+        # If resulted offset sympy expr is convertible to int constant it
+        # will be directly encoded into `arith.constant`.
+        # For non-constant expressions, we will generate a real sequence of
+        # arith ops and then `vector.insertelement` them into offsets vec.
+        offset = int(offset)
+        is_identity = is_identity and offset == i
+        offsets.append(offset)
+
+    return offsets, is_identity
+
+
+def _get_index_mapping(
+    mapping: IndexMapping,
+    symbolic_shape: tuple[IndexExpr, ...],
     is_read: bool,
-    dynamic_vals: tuple[Any, ...],
-    is_contiguous: bool,
-    memory: CustomOp,
-    bounds: Optional[dict[IndexSymbol, IndexExpr]],
-) -> tuple[list[OpResult], list[OpResult], list[OpResult], OpResult, OpResult]:
-    # Apply symbolic_shape order to indices, e.g. if original mapping is
-    # {M: iter(0), N: iter(1)} and symbolic_shape is (N, M), result will
-    # be (iter(1), iter(0))
+    emitter: WaveEmitter,
+) -> tuple[IndexExpr, ...]:
+    """
+    Returns the memory side of `mapping` ordered as `symbolic_shape`, with the
+    indexing context substituted. The result is cached per emitter, as the
+    same mapping is usually shared by many reads/writes.
+    """
+    key = (mapping, tuple(symbolic_shape), is_read)
+    index_mapping = emitter._index_mapping_cache.get(key)
+    if index_mapping is not None:
+        return index_mapping
+
     if is_read:
         assert (
             mapping.is_output_identity()
@@ -196,6 +385,27 @@ def _construct_gather_scatter_indices(
 
     idxc = IndexingContext.current()
     index_mapping = tuple(i.subs(idxc.subs) for i in index_mapping)
+    emitter._index_mapping_cache[key] = index_mapping
+    return index_mapping
+
+
+def _construct_gather_scatter_indices(
+    emitter: WaveEmitter,
+    symbolic_shape: tuple[IndexExpr],
+    index: tuple[IndexExpr],
+    mapping: IndexMapping,
+    elements_per_thread: int,
+    is_read: bool,
+    dynamic_vals: tuple[Any, ...],
+    is_contiguous: bool,
+    memory: CustomOp,
+    bounds: Optional[dict[IndexSymbol, IndexExpr]],
+) -> tuple[list[OpResult], list[OpResult], list[OpResult], OpResult, OpResult]:
+    # Apply symbolic_shape order to indices, e.g. if original mapping is
+    # {M: iter(0), N: iter(1)} and symbolic_shape is (N, M), result will
+    # be (iter(1), iter(0))
+    idxc = IndexingContext.current()
+    index_mapping = _get_index_mapping(mapping, symbolic_shape, is_read, emitter)
 
     iters = mapping.iters
 
@@ -243,39 +453,20 @@ def _construct_gather_scatter_indices(
         if shape[0] > 1:
             need_dynamic_offsets = True
 
-    offsets = []
     if memory.type.address_space == SHARED_ADDRESS_SPACE:
         symbolic_shape = memory.distributed_shape
-    strides = strides_from_symbolic_shape(idxc, symbolic_shape, allow_mixed_shapes=True)
-    start_indices_offset = _compute_offset(start_indices, strides)
-    for i in range(elements_per_thread):
-        # Update fastest dim, i.e. in case of identity mapping it will
-        # be equivalent to just vector.load
-        subs = [(sym, idx) for sym, idx in zip(iters.keys(), start_indices_orig)]
-        subs[fastest_dim] = (subs[fastest_dim][0], start_indices_orig[fastest_dim] + i)
-        indices = [i.subs(subs) for i in index_mapping]
-
-        # First, we build indices as if resulting gather/scatter `start_indices`
-        # are 0 as mapping expression may depend on absolute value of index
-        # (e.g. `index % 32`). Then we adjust for the non-0 `start_indices` by
-        # subtracting computed previously linear `start_indices_offset`. For
-        # simple cases like transpose, the resulting expression should fold into
-        # simple constant while more complex expressions may requires actual
-        # arith ops on dynamic values.
-        offset = _compute_offset(indices, strides) - start_indices_offset
-        offset = subs_idxc(offset)
-
-        if offset.is_number:
-            # If resulted offset sympy expr is convertible to int constant it
-            # will be directly encoded into `arith.constant`.
-            # For non-constant expressions, we will generate a real sequence of
-            # arith ops and then `vector.insertelement` them into offsets vec.
-            offset = int(offset)
-        else:
-            need_dynamic_offsets = True
-            break
-
-        offsets.append(offset)
+    strides, _ = _lookup_strides(emitter, symbolic_shape)
+    if not need_dynamic_offsets:
+        offsets, is_identity = _get_const_offsets(
+            index_mapping,
+            list(iters.keys()),
+            start_indices,
+            start_indices_orig,
+            fastest_dim,
+            strides,
+            elements_per_thread,
+        )
+        need_dynamic_offsets = offsets is None
 
     offsets_vec_type = VectorType.get([elements_per_thread], IndexType.get())
     if need_dynamic_offsets:
@@ -308,7 +499,7 @@ def _construct_gather_scatter_indices(
         start_indices, start_indices_wg, start_indices_th = _build_start_indices(
             emitter, result_index, dynamic_vals_map_start
         )
-        if offsets == list(range(elements_per_thread)):
+        if is_identity:
             return start_indices, start_indices_wg, start_indices_th, None, mask
 
         offsets = [IntegerAttr.get(IndexType.get(), off) for off in offsets]
@@ -328,7 +519,27 @@ def _get_max_buffer_size(elem_type: IrType) -> int:
     return ((1 << 31) - 1) // (elem_type.width // 8)
 
 
+def _sum_tree(
+    values: list[Value], overflow_flags: arith_d.IntegerOverflowFlags
+) -> Value:
+    """
+    Sums `values` with a balanced tree of `arith.addi` to keep the dependency
+    chain logarithmic in the number of values.
+    """
+    while len(values) > 1:
+        sums = [
+            arith_d.addi(a, b, overflow_flags=overflow_flags)
+            for a, b in zip(values[::2], values[1::2])
+        ]
+        if len(values) % 2:
+            sums.append(values[-1])
+        values = sums
+
+    return values[0]
+
+
 def _linearize_memref(
+    emitter: WaveEmitter,
     mem: Value,
     offsets_wg: tuple[Value | int],
     offsets_th: tuple[Value | int],
@@ -341,31 +552,33 @@ def _linearize_memref(
     is set to `max_buffer_size - 1` so buffer access to the last element will be
     no-op.
     """
-    memref_type = mem.type
-    offset = None
-    offset_th = None
     overflow_flags = arith_d.IntegerOverflowFlags.nsw
-    for ind_wg, ind_th, stride in zip(offsets_wg, offsets_th, strides):
-        if isinstance(ind_wg, int):
-            ind_wg = arith_d.constant(IndexType.get(), ind_wg)
 
-        if isinstance(ind_th, int):
-            ind_th = arith_d.constant(IndexType.get(), ind_th)
+    def linear_offset(indices):
+        terms = []
+        for ind, stride in zip(indices, strides):
+            if isinstance(ind, int):
+                ind = _emit_const(emitter, IndexType.get(), ind)
 
-        off_wg = arith_d.muli(ind_wg, stride, overflow_flags=overflow_flags)
-        if offset is None:
-            offset = off_wg
-        else:
-            offset = arith_d.addi(offset, off_wg, overflow_flags=overflow_flags)
+            terms.append(arith_d.muli(ind, stride, overflow_flags=overflow_flags))
 
-        off_th = arith_d.muli(ind_th, stride, overflow_flags=overflow_flags)
-        if offset_th is None:
-            offset_th = off_th
-        else:
-            offset_th = arith_d.addi(offset_th, off_th, overflow_flags=overflow_flags)
+        return _sum_tree(terms, overflow_flags)
+
+    # Accesses to the same memory with the same workgroup offsets share the
+    # linearized memref and only differ in the thread offset.
+    key = (InsertionPoint.current.block, mem, tuple(offsets_wg), tuple(strides))
+    linearized = emitter._memref_cast_cache.get(key)
+    if linearized is None:
+        linearized = _reinterpret_as_1d(emitter, mem, linear_offset(offsets_wg))
+        emitter._memref_cast_cache[key] = linearized
+
+    return linearized, linear_offset(offsets_th)
 
-    size_full = arith_d.constant(
-        IndexType.get(), _get_max_buffer_size(memref_type.element_type) - 1
+
+def _reinterpret_as_1d(emitter: WaveEmitter, mem: Value, offset: Value) -> Value:
+    memref_type = mem.type
+    size_full = _emit_const(
+        emitter, IndexType.get(), _get_max_buffer_size(memref_type.element_type) - 1
     )
 
     dyn_val = ShapedType.get_dynamic_size()
@@ -378,18 +591,15 @@ def _linearize_memref(
         layout=Attribute.parse("strided<[1], offset: ?>"),
         memory_space=memory_space,
     )
-    return (
-        memref_d.reinterpret_cast(
-            resut_type,
-            mem,
-            offsets=[offset],
-            sizes=[size_full],
-            strides=[],
-            static_offsets=[dyn_val],
-            static_sizes=[dyn_val],
-            static_strides=[1],
-        ),
-        offset_th,
+    return memref_d.reinterpret_cast(
+        resut_type,
+        mem,
+        offsets=[offset],
+        sizes=[size_full],
+        strides=[],
+        static_offsets=[dyn_val],
+        static_sizes=[dyn_val],
+        static_strides=[1],
     )
 
 
@@ -420,7 +630,12 @@ def _valid_bytes_buffer(elem_type: IrType) -> int:
     """
     Make valid bytes to be the address of the last byte of the second to last element that can fit in a 32 bit offset to memory address
     """
-    ans = (1 << 31) - 1 - (elem_type.width // 8)
+    return _valid_bytes_for_width(elem_type.width)
+
+
+@functools.lru_cache(maxsize=16)
+def _valid_bytes_for_width(width: int) -> int:
+    ans = (1 << 31) - 1 - (width // 8)
 
     assert isinstance(ans, int)
     return ans
@@ -430,19 +645,41 @@ def _get_out_of_bounds_index(element_type: IrType) -> int:
     """
     returns the first index that's out of bounds of a buffer based on the element type and maximum bytes
     """
-    element_width_in_bytes = element_type.width // 8
-    oob_index_value = (
-        _valid_bytes_buffer(element_type) + element_width_in_bytes
-    ) // element_width_in_bytes
-    assert (oob_index_value * element_width_in_bytes) > _valid_bytes_buffer(
-        element_type
-    )
+    return _out_of_bounds_index_for_width(element_type.width)
+
+
+def _emit_out_of_bounds_index(emitter: WaveEmitter, element_type: IrType) -> Value:
+    """
+    Returns the out of bounds index constant, shared by all accesses to the same
+    element type within the current insertion block.
+    """
+    return _emit_const(emitter, IndexType.get(), _get_out_of_bounds_index(element_type))
+
+
+@functools.lru_cache(maxsize=16)
+def _out_of_bounds_index_for_width(width: int) -> int:
+    element_width_in_bytes = width // 8
+    valid_bytes = _valid_bytes_for_width(width)
+    oob_index_value = (valid_bytes + element_width_in_bytes) // element_width_in_bytes
+    assert (oob_index_value * element_width_in_bytes) > valid_bytes
     assert (oob_index_value * element_width_in_bytes) < (1 << 31)
     return oob_index_value
 
 
 def _cast_buffer_and_encode_stride(
     ptr: Value, strides: tuple[Value], elem_type: IrType, emitter: WaveEmitter
+) -> Value:
+    key = (InsertionPoint.current.block, ptr, tuple(strides))
+    buffer = emitter._memref_cast_cache.get(key)
+    if buffer is None:
+        buffer = _cast_buffer(ptr, strides, elem_type, emitter)
+        emitter._memref_cast_cache[key] = buffer
+
+    return buffer
+
+
+def _cast_buffer(
+    ptr: Value, strides: tuple[Value], elem_type: IrType, emitter: WaveEmitter
 ) -> Value:
     uint32 = IntegerType.get_signless(32)
     uint14 = IntegerType.get_signless(14)
@@ -450,8 +687,7 @@ def _cast_buffer_and_encode_stride(
     valid_bytes = _valid_bytes_buffer(
         elem_type
     )  # max bytes that are in range to be addressed from a buffer
-    valid_bytes_constant = get_constant_attr(valid_bytes, uint32)
-    valid_bytes_constant = arith_d.constant(uint32, valid_bytes_constant)
+    valid_bytes_constant = _emit_const(emitter, uint32, valid_bytes)
     stride_rank = len(strides)
     stride = None
 
@@ -498,11 +734,17 @@ def _create_vec_read_write(
     offsets_vec: Optional[Value],
 ) -> Optional[Value]:
     is_read = value is None
-    uint32 = IntegerType.get_signless(32)
+
+    i1_type = IntegerType.get_signless(1)
+    index_type = IndexType.get()
 
     def extract(vec, ind):
         return vector_d.extract(vec, static_position=[ind], dynamic_position=[])
 
+    def extract_slice(vec, ind):
+        vec1_type = VectorType.get([1], vec.type.element_type)
+        return vector_d.extract_strided_slice(vec1_type, vec, [ind], [1], [1])
+
     if memory.type.address_space == SHARED_ADDRESS_SPACE and hasattr(
         memory, "distributed_shape"
     ):
@@ -517,11 +759,8 @@ def _create_vec_read_write(
         else emitter.options.use_buffer_store_ops
     )
 
-    strides = strides_from_symbolic_shape(
-        IndexingContext.current(), symbolic_shape, allow_mixed_shapes=True
-    )
-    has_int_strides = all(isinstance(s, int) for s in strides)
-    strides = [gen_sympy_index(add_emitter_subs(emitter), s) for s in strides]
+    symbolic_strides, strides = _get_strides(emitter, symbolic_shape)
+    has_int_strides = all(isinstance(s, int) for s in symbolic_strides)
 
     buffer_ops_enabled = buffer_ops_enabled and use_buffer_ops
     no_masked_load_store_ops = buffer_ops_enabled
@@ -540,7 +779,7 @@ def _create_vec_read_write(
             # TODO: If strides cannot be converted into integers, means they are dynamic
             # and linearize breaks, need to investigate later.
             mem, offset_th = _linearize_memref(
-                mem, start_indices_wg, start_indices_th, strides
+                emitter, mem, start_indices_wg, start_indices_th, strides
             )
             mem = _cast_buffer_and_encode_stride(mem, strides, element_type, emitter)
 
@@ -551,28 +790,19 @@ def _create_vec_read_write(
             vector_d.store(value, mem, indices)
             return
 
-    zero = get_constant_attr(0, element_type)
-    zero = arith_d.constant(element_type, zero)
+    zero = _emit_const(emitter, element_type, 0)
 
     if mask is None:
-        mask_vec_type = VectorType.get(
-            [elements_per_thread], IntegerType.get_signless(1)
-        )
+        mask_vec_type = VectorType.get([elements_per_thread], i1_type)
         mask = _constant_mask(mask_vec_type)
 
     # Case 2: Generate load/stores with no offset
     if offsets_vec is None:
-        # make offsets 0, 1, 2 ...
-        offsets_vec_type = VectorType.get(vector_type.shape, IndexType.get())
-        vals = [IntegerAttr.get(IndexType.get(), v) for v in range(elements_per_thread)]
-
-        offsets_vec = arith_d.constant(
-            offsets_vec_type, DenseElementsAttr.get(vals, offsets_vec_type)
-        )
+        offsets_vec_type = VectorType.get(vector_type.shape, index_type)
 
         if buffer_ops_enabled:
             mem, offset_th = _linearize_memref(
-                mem, start_indices_wg, start_indices_th, strides
+                emitter, mem, start_indices_wg, start_indices_th, strides
             )
             mem = _cast_buffer_and_encode_stride(mem, strides, element_type, emitter)
 
@@ -580,34 +810,13 @@ def _create_vec_read_write(
 
         if no_masked_load_store_ops:
             # find the index at which memory out of bounds of buffer
-            oob_index_value = _get_out_of_bounds_index(element_type)
-            oob_index = arith_d.constant(IndexType.get(), oob_index_value)
-
-            oob_index = vector_d.broadcast(
-                VectorType.get(vector_type.shape, IndexType.get()), oob_index
-            )
-
-            offset_th = vector_d.broadcast(
-                VectorType.get(vector_type.shape, IndexType.get()), offset_th
-            )
-
-            uint32_vec_type = VectorType.get([elements_per_thread], uint32)
-            indexvec_type = VectorType.get([elements_per_thread], IndexType.get())
-
-            offsets_vec = arith_d.index_cast(uint32_vec_type, offsets_vec)
-            offset_th = arith_d.index_cast(uint32_vec_type, offset_th)
-
-            # add the thread offset and the vec offsets
-            offsets_vec = arith_d.addi(offsets_vec, offset_th)
-            offsets_vec = arith_d.index_cast(indexvec_type, offsets_vec)
-
-            # based on mask, select between the offsets_vec and out of bounds. In this case all 3 operands can be vectors
-            selected_index = arith_d.select(mask, offsets_vec, oob_index)
-            elems = list()
+            oob_index = _emit_out_of_bounds_index(emitter, element_type)
 
             if splatted_mask:
-                # mask is same for all of them, can just pick the first index
-                selected_index = extract(selected_index, 0)
+                # mask is same for all of them, so the whole access is either
+                # in or out of bounds and a scalar select on the base offset
+                # is enough.
+                selected_index = arith_d.select(mask_splat, offset_th, oob_index)
 
                 if is_read:
                     return vector_d.load(vector_type, mem, indices=[selected_index])
@@ -616,25 +825,56 @@ def _create_vec_read_write(
                     vector_d.store(value, mem, indices=[selected_index])
                     return
 
-            for i in range(elements_per_thread):
-                # mask is not same for all elements, need to unroll
-                this_index = extract(selected_index, i)  # this element
+            # The mask is only partially set on the tail of the iteration
+            # space, so do a single full width access when it is all set and
+            # only unroll into per-element accesses otherwise. The per-element
+            # offsets are built inside the unrolled branch so the full width
+            # access does not pay for them.
+            all_set = vector_d.reduction(i1_type, vector_d.CombiningKind.AND, mask)
+            if_op = scf_d.IfOp(all_set, [vector_type] if is_read else [], hasElse=True)
+            with InsertionPoint(if_op.then_block):
+                if is_read:
+                    scf_d.YieldOp([vector_d.load(vector_type, mem, indices)])
+                else:
+                    vector_d.store(value, mem, indices)
+                    scf_d.YieldOp([])
+
+            with InsertionPoint(if_op.else_block):
+                oob_index = vector_d.broadcast(offsets_vec_type, oob_index)
+                offset_th_vec = vector_d.broadcast(offsets_vec_type, offset_th)
+
+                # add the thread offset to the vec offsets 0, 1, 2 ...
+                offsets_vec = vector_d.step(offsets_vec_type)
+                offsets_vec = arith_d.addi(offsets_vec, offset_th_vec)
+
+                # based on mask, select between the offsets_vec and out of bounds. In this case all 3 operands can be vectors
+                selected_index = arith_d.select(mask, offsets_vec, oob_index)
+                elems = list()
+
+                for i in range(elements_per_thread):
+                    # mask is not same for all elements, need to unroll
+                    this_index = extract(selected_index, i)  # this element
+
+                    # Unmasked load, using selected_index
+                    singlenumvec_type = VectorType.get([1], vector_type.element_type)
+                    if is_read:
+                        elem = vector_d.load(
+                            singlenumvec_type, mem, indices=[this_index]
+                        )
+                        elem = extract(elem, 0)
+                        elems.append(elem)
+                    else:
+                        single_num_vector = extract_slice(value, i)
+                        vector_d.store(single_num_vector, mem, indices=[this_index])
 
-                # Unmasked load, using selected_index
-                singlenumvec_type = VectorType.get([1], vector_type.element_type)
                 if is_read:
-                    elem = vector_d.load(singlenumvec_type, mem, indices=[this_index])
-                    elem = extract(elem, 0)
-                    elems.append(elem)
+                    # now make a vector from all the elements loaded
+                    scf_d.YieldOp([vector_d.from_elements(vector_type, elems)])
                 else:
-                    elem = extract(value, i)
-                    single_num_vector = vector_d.broadcast(singlenumvec_type, elem)
-                    vector_d.store(single_num_vector, mem, indices=[this_index])
+                    scf_d.YieldOp([])
 
             if is_read:
-                # now make a vector from all the elements loaded
-                return vector_d.from_elements(vector_type, elems)
-
+                return if_op.result
             else:  # it was a store, return
                 return
 
@@ -655,14 +895,17 @@ def _create_vec_read_write(
     # TODO: Drop case 3 and case 4, by adding support for non-trivial mapping and readOps on partition_strided_operator.
     if has_int_strides:
         vec1 = VectorType.get([1], element_type)
-        vec1_mask = VectorType.get([1], IntegerType.get_signless(1))
+        vec1_mask = VectorType.get([1], i1_type)
         # TODO: Need static strides for linearize to work.
         mem, _ = _linearize_memref(
-            mem, start_indices, (0,) * len(start_indices), strides
+            emitter, mem, start_indices, (0,) * len(start_indices), strides
         )
         if buffer_ops_enabled:
             mem = _cast_buffer_and_encode_stride(mem, strides, element_type, emitter)
 
+        if no_masked_load_store_ops:
+            oob_index = _emit_out_of_bounds_index(emitter, element_type)
+
         # Unroll gather/scatter into individual masked ops.
         # Vector canonicalizations will convert them into unmasked later if
         # mask is constant.
@@ -675,15 +918,6 @@ def _create_vec_read_write(
                 offset_th = extract(offsets_vec, i)
 
                 if no_masked_load_store_ops:
-                    oob_index_value = _get_out_of_bounds_index(element_type)
-                    oob_index = arith_d.constant(IndexType.get(), oob_index_value)
-
-                    offsets_vec_type = (
-                        VectorType.get(vector_type.shape, IndexType.get())
-                        if offsets_vec is None
-                        else offsets_vec.type
-                    )
-
                     # each of these are single element
                     selected_index = arith_d.select(mask_elem, offset_th, oob_index)
                     indices = [selected_index]
@@ -704,13 +938,9 @@ def _create_vec_read_write(
 
                 offset_th = extract(offsets_vec, i)
 
-                elem = extract(value, i)
-                elem = vector_d.broadcast(vec1, elem)
+                elem = extract_slice(value, i)
 
                 if no_masked_load_store_ops:
-                    oob_index_value = _get_out_of_bounds_index(element_type)
-                    oob_index = arith_d.constant(IndexType.get(), oob_index_value)
-
                     selected_index = arith_d.select(mask_elem, offset_th, oob_index)
                     vector_d.store(elem, mem, [selected_index])
 
@@ -732,6 +962,21 @@ def _create_vec_read_write(
         return
 
 
+def _build_identity_indices(
+    emitter: WaveEmitter,
+    index: dict[IndexExpr, IndexSequence],
+    elements_per_thread: int,
+    bounds: Optional[dict[IndexSymbol, IndexExpr]],
+) -> tuple[list[OpResult], list[OpResult], list[OpResult], None, OpResult]:
+    # Both only need the emitter values, so share a single substitution map.
+    subs = add_emitter_subs(emitter)
+    start_indices, start_indices_wg, start_indices_th = _build_start_indices(
+        emitter, index, subs=subs
+    )
+    mask = _build_mask(emitter, index, elements_per_thread, bounds, subs=subs)
+    return start_indices, start_indices_wg, start_indices_th, None, mask
+
+
 @handle_op(read)
 def handle_read(emitter: WaveEmitter, node: fx.Node):
     # This is similar to tkl.store with fixed start indices for now.
@@ -751,38 +996,17 @@ def handle_read(emitter: WaveEmitter, node: fx.Node):
 
     element_type = kb_ir_type.element_type
     vector_type = VectorType.get(vector_shape, element_type)
-    input_shape = _get_symbolic_shape(memory)
+    custom = get_custom(node)
+    memory = get_custom(memory)
+    input_shape = memory.type.symbolic_shape
     elements_per_thread = cast_py_literal(emitter, elements_per_thread)
-    if get_custom(node).has_identity_mapping():
-        start_indices, start_indices_wg, start_indices_th = _build_start_indices(
-            emitter, index
-        )
-        mask = _build_mask(emitter, index, elements_per_thread, bounds)
-        result = _create_vec_read_write(
-            emitter,
-            input_shape,
-            kb_src,
-            None,
-            vector_type,
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            elements_per_thread,
-            get_custom(memory),
-            mask,
-            offsets_vec=None,
-        )
+    if custom.has_identity_mapping():
+        indices = _build_identity_indices(emitter, index, elements_per_thread, bounds)
     else:
         dyn_vals = tuple(
             cast_vector(emitter, reg, element_type=IndexType.get()) for reg in dyn_vals
         )
-        (
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            offsets_vec,
-            mask,
-        ) = _construct_gather_scatter_indices(
+        indices = _construct_gather_scatter_indices(
             emitter=emitter,
             symbolic_shape=input_shape,
             index=index,
@@ -790,24 +1014,26 @@ def handle_read(emitter: WaveEmitter, node: fx.Node):
             elements_per_thread=elements_per_thread,
             is_read=True,
             dynamic_vals=dyn_vals,
-            is_contiguous=get_custom(node).is_contiguous_vec(),
-            memory=get_custom(memory),
+            is_contiguous=custom.is_contiguous_vec(),
+            memory=memory,
             bounds=bounds,
         )
-        result = _create_vec_read_write(
-            emitter,
-            input_shape,
-            kb_src,
-            None,
-            vector_type,
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            elements_per_thread,
-            get_custom(memory),
-            mask,
-            offsets_vec,
-        )
+
+    start_indices, start_indices_wg, start_indices_th, offsets_vec, mask = indices
+    result = _create_vec_read_write(
+        emitter,
+        input_shape,
+        kb_src,
+        None,
+        vector_type,
+        start_indices,
+        start_indices_wg,
+        start_indices_th,
+        elements_per_thread,
+        memory,
+        mask,
+        offsets_vec,
+    )
 
     emitter.bind_node_proxy(node, IRProxyValue(result))
 
@@ -838,29 +1064,14 @@ def handle_write(emitter: WaveEmitter, node: fx.Node):
 
     index = node.index
 
-    input_shape = _get_symbolic_shape(register)
-    output_shape = _get_symbolic_shape(memory)
+    custom = get_custom(node)
+    memory = get_custom(memory)
+    output_shape = memory.type.symbolic_shape
     elements_per_thread = cast_py_literal(emitter, elements_per_thread)
-    if get_custom(node).has_identity_mapping():
-        start_indices, start_indices_wg, start_indices_th = _build_start_indices(
-            emitter, index
-        )
-        mask = _build_mask(emitter, index, elements_per_thread, bounds)
-        _create_vec_read_write(
-            emitter,
-            output_shape,
-            kb_dest,
-            insert_vector,
-            None,
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            elements_per_thread,
-            get_custom(memory),
-            mask,
-            offsets_vec=None,
-        )
+    if custom.has_identity_mapping():
+        indices = _build_identity_indices(emitter, index, elements_per_thread, bounds)
     else:
+        input_shape = _get_symbolic_shape(register)
         assert (
             input_shape == mapping.input_shape
         ), f"non-identity input mapping is not supported yet. \nFound input_shape as {input_shape} and mapping.input_shape as {mapping.input_shape}."
@@ -868,13 +1079,7 @@ def handle_write(emitter: WaveEmitter, node: fx.Node):
         dyn_vals = tuple(
             cast_vector(emitter, reg, element_type=IndexType.get()) for reg in dyn_vals
         )
-        (
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            offsets_vec,
-            mask,
-        ) = _construct_gather_scatter_indices(
+        indices = _construct_gather_scatter_indices(
             emitter=emitter,
             symbolic_shape=output_shape,
             index=index,
@@ -882,25 +1087,26 @@ def handle_write(emitter: WaveEmitter, node: fx.Node):
             elements_per_thread=elements_per_thread,
             is_read=False,
             dynamic_vals=dyn_vals,
-            is_contiguous=get_custom(node).is_contiguous_vec(),
-            memory=get_custom(memory),
+            is_contiguous=custom.is_contiguous_vec(),
+            memory=memory,
             bounds=bounds,
         )
 
-        _create_vec_read_write(
-            emitter,
-            output_shape,
-            kb_dest,
-            insert_vector,
-            None,
-            start_indices,
-            start_indices_wg,
-            start_indices_th,
-            elements_per_thread,
-            get_custom(memory),
-            mask,
-            offsets_vec,
-        )
+    start_indices, start_indices_wg, start_indices_th, offsets_vec, mask = indices
+    _create_vec_read_write(
+        emitter,
+        output_shape,
+        kb_dest,
+        insert_vector,
+        None,
+        start_indices,
+        start_indices_wg,
+        start_indices_th,
+        elements_per_thread,
+        memory,
+        mask,
+        offsets_vec,
+    )
 
 
 @handle_op(gather_to_lds)
@@ -925,23 +1131,20 @@ def handle_gather_to_lds(emitter: WaveEmitter, node: fx.Node):
     src_symbolic_shape = _get_symbolic_shape(src)
     dst_symbolic_shape = _get_symbolic_shape(dst)
 
-    src = cast_py_value(emitter, src)
-    dst = cast_py_value(emitter, dst)
-    src_data_type = get_type_or_element_type(src.ir_value.type)
-    dst_data_type = get_type_or_element_type(dst.ir_value.type)
+    src = cast_py_value(emitter, src).ir_value
+    dst = cast_py_value(emitter, dst).ir_value
 
-    if not (
-        MemRefType.isinstance(src.ir_value.type)
-        and MemRefType.isinstance(dst.ir_value.type)
-    ):
+    if not (MemRefType.isinstance(src.type) and MemRefType.isinstance(dst.type)):
         op = get_custom(node)
         raise ValidationError(
             f"Expected src and dst to be of Memref type for\n"
             f"{op}\nGot\n"
-            f"src: {src.ir_value.type}\n"
-            f"dst: {dst.ir_value.type}\n"
+            f"src: {src.type}\n"
+            f"dst: {dst.type}\n"
         )
 
+    src_data_type = get_type_or_element_type(src.type)
+    dst_data_type = get_type_or_element_type(dst.type)
     if src_data_type != dst_data_type:
         op = get_custom(node)
         raise ValidationError(
@@ -950,9 +1153,6 @@ def handle_gather_to_lds(emitter: WaveEmitter, node: fx.Node):
             f"src: {src_data_type} vs dst: {dst_data_type}\n"
         )
 
-    src = src.ir_value
-    dst = dst.ir_value
-
     if src_mapping:
         src_idx = transform_index_on_mapping(src_mapping, src_symbolic_shape, src_idx)
     if dst_mapping:
@@ -961,23 +1161,24 @@ def handle_gather_to_lds(emitter: WaveEmitter, node: fx.Node):
     store_type = VectorType.get((elements_per_thread,), element_type)
 
     src_index, src_index_wg, src_index_th = _build_start_indices(emitter, src_idx)
-    dst_index, _, _ = _build_start_indices(emitter, dst_idx)
+    # Only the full dst indices are needed, skip splitting them into
+    # workgroup and thread parts.
+    subs = add_emitter_subs(emitter)
+    dst_index = [gen_sympy_index(subs, i) for i in _get_start_indices(dst_idx)]
 
-    strides = strides_from_symbolic_shape(
-        IndexingContext.current(), src_symbolic_shape, allow_mixed_shapes=True
-    )
-    strides = [gen_sympy_index(add_emitter_subs(emitter), s) for s in strides]
+    _, strides = _get_strides(emitter, src_symbolic_shape)
 
-    src, offset_th = _linearize_memref(src, src_index_wg, src_index_th, strides)
+    src, offset_th = _linearize_memref(
+        emitter, src, src_index_wg, src_index_th, strides
+    )
     src = _cast_buffer_and_encode_stride(src, strides, element_type, emitter)
 
     # We previously checked mask is same for all elements, so we can use
     # elements_per_thread=1 to build the mask.
     mask = _build_mask(emitter, src_idx, elements_per_thread=1, bounds=src_bounds)
-    if mask:
+    if mask is not None and not _is_all_ones_mask(mask):
         mask = vector_d.extract(mask, static_position=[0], dynamic_position=[])
-        oob_index_value = _get_out_of_bounds_index(element_type)
-        oob_index = arith_d.constant(IndexType.get(), oob_index_value)
+        oob_index = _emit_out_of_bounds_index(emitter, element_type)
         offset_th = arith_d.select(mask, offset_th, oob_index)
 
     src_index = [offset_th]
@@ -1011,7 +1212,6 @@ def _handle_scatter_op(
 
     output_shape = _get_symbolic_shape(memory)
     elements_per_thread = int(cast_py_literal(emitter, elements_per_thread))
-    cast_vector(emitter, register_idx, element_type=IndexType.get())
 
     index_mapping = mapping.map_output_indices(output_shape)
 
@@ -1025,13 +1225,6 @@ def _handle_scatter_op(
 
     result_index = {key: m.subs(subs) for key, m in zip(output_shape, index_mapping)}
 
-    mask = _build_mask(emitter, index, elements_per_thread, bounds)
-    if mask is None:
-        mask_vec_type = VectorType.get(
-            [elements_per_thread], IntegerType.get_signless(1)
-        )
-        mask = _constant_mask(mask_vec_type)
-
     start_indices, start_indices_wg, start_indices_th = _build_start_indices(
         emitter, result_index
     )
@@ -1040,38 +1233,75 @@ def _handle_scatter_op(
     register_src = cast_py_value(emitter, register_src).ir_value
     memory = cast_py_value(emitter, memory).ir_value
 
-    results = []
-    for i in range(elements_per_thread):
-        index_elem = vector_d.extract(
-            register_idx, static_position=[i], dynamic_position=[]
-        )
-        index_elem = arith_d.index_cast(IndexType.get(), index_elem)
-        reg_elem = vector_d.extract(
-            register_src, static_position=[i], dynamic_position=[]
-        )
-        indices = list(start_indices)
-        if dim >= len(indices):
-            raise ValueError(
-                f"Invalid scatter dim {dim} for rank-{len(indices)} memory"
-            )
+    rank = len(start_indices)
+    if dim >= rank:
+        raise ValueError(f"Invalid scatter dim {dim} for rank-{rank} memory")
+
+    index_type = IndexType.get()
+    # Cast all the lane indices at once instead of lane by lane.
+    index_vec_type = VectorType.get([elements_per_thread], index_type)
+    if register_idx.type != index_vec_type:
+        register_idx = arith_d.index_cast(index_vec_type, register_idx)
+
+    # Flatten the memory so each lane only needs a single linear offset,
+    # `base + idx * stride[dim] + lane * stride[fast_dim]`, where `base` holds
+    # the contribution of all the other dimensions.
+    static_strides, _ = MemRefType(memory.type).get_strides_and_offset()
+    if MemRefType.get_dynamic_stride_or_offset() in static_strides:
+        static_strides = None
+        strides = _get_strides(emitter, output_shape)[1]
+    else:
+        strides = [_emit_const(emitter, index_type, s) for s in static_strides]
+
+    offsets_wg = list(start_indices_wg)
+    offsets_th = list(start_indices_th)
+    offsets_wg[dim] = offsets_th[dim] = 0
+    memory, base = _linearize_memref(emitter, memory, offsets_wg, offsets_th, strides)
 
-        indices[dim] = index_elem
-
-        # In case 4 elements per thread are used, makes sure values are stored at the right non-scatter dimension
-        if elements_per_thread > 1:
-            other_dims = [d for d in range(len(indices)) if d != dim]
-            if other_dims:
-                # Heuristic: offset the innermost (fastest varying) dimension
-                # TODO: Ideally emit a vectorized atomic op instead of 4 scalar atomics that store to consecutive locations
-                fast_dim = other_dims[-1]
-                indices[fast_dim] = arith_d.addi(
-                    indices[fast_dim], arith_d.constant(IndexType.get(), i)
-                )
-        result = memref_d.atomic_rmw(rmw_kind, reg_elem, memory, indices)
-        results.append(result)
-
-    result_type = VectorType.get([elements_per_thread], register_src.type.element_type)
-    result_vector = vector_d.from_elements(result_type, results)
+    overflow_flags = arith_d.IntegerOverflowFlags.nsw
+    offsets = arith_d.muli(
+        register_idx,
+        vector_d.broadcast(index_vec_type, strides[dim]),
+        overflow_flags=overflow_flags,
+    )
+    offsets = arith_d.addi(
+        offsets,
+        vector_d.broadcast(index_vec_type, base),
+        overflow_flags=overflow_flags,
+    )
+
+    # In case 4 elements per thread are used, makes sure values are stored at the right non-scatter dimension
+    other_dims = [d for d in range(rank) if d != dim]
+    if elements_per_thread > 1 and other_dims:
+        # Heuristic: offset the innermost (fastest varying) dimension
+        # TODO: Ideally emit a vectorized atomic op instead of 4 scalar atomics that store to consecutive locations
+        fast_dim = other_dims[-1]
+        if static_strides is not None:
+            # Known stride, the whole lane to offset map is a single constant.
+            lane_offsets = [
+                IntegerAttr.get(index_type, i * static_strides[fast_dim])
+                for i in range(elements_per_thread)
+            ]
+            lane_offsets = arith_d.constant(
+                index_vec_type, DenseElementsAttr.get(lane_offsets, index_vec_type)
+            )
+        else:
+            lane_offsets = arith_d.muli(
+                vector_d.step(index_vec_type),
+                vector_d.broadcast(index_vec_type, strides[fast_dim]),
+                overflow_flags=overflow_flags,
+            )
+        offsets = arith_d.addi(offsets, lane_offsets, overflow_flags=overflow_flags)
+
+    # Lanes may hit the same location, so each one needs its own atomic update,
+    # a vector.scatter would lose the colliding contributions.
+    # Unpack both vectors with a single op each instead of one extract per lane.
+    # Take the result list from the op, for a single lane `to_elements` returns
+    # the lone result instead of a list.
+    lane_elems = vector_d.ToElementsOp(register_src).results
+    elem_offsets = vector_d.ToElementsOp(offsets).results
+    for reg_elem, offset in zip(lane_elems, elem_offsets):
+        memref_d.atomic_rmw(rmw_kind, reg_elem, memory, [offset])
 
 
 @handle_op(scatter_add)
@@ -4,6 +4,7 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import functools
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
@@ -69,13 +70,35 @@ class ScaledMMAType(Enum):
     F32_32x32x64_F8F6F4 = 0x1341
 
 
+_THREAD_IDS = (THREAD_0, THREAD_1, THREAD_2)
+_WORKGROUP_IDS = (WORKGROUP_0, WORKGROUP_1, WORKGROUP_2)
+
+# M x N x K
+_MMA_SHAPES: dict[MMAType | ScaledMMAType, tuple[int, int, int]] = {
+    MMAType.F32_16x16x16_F16: (16, 16, 16),
+    MMAType.I32_16x16x16_I8: (16, 16, 16),
+    MMAType.F32_32x32x8_F16: (32, 32, 8),
+    MMAType.I32_32x32x8_I8: (32, 32, 8),
+    MMAType.F32_16x16x32_F8: (16, 16, 32),
+    MMAType.F32_16x16x32_K8_F16: (16, 16, 32),
+    MMAType.F32_16x16x32_K4_F8: (16, 16, 32),
+    MMAType.I32_16x16x32_I8: (16, 16, 32),
+    MMAType.F32_32x32x16_F8: (32, 32, 16),
+    MMAType.F32_32x32x16_K8_F16: (32, 32, 16),
+    MMAType.F32_32x32x16_K4_F8: (32, 32, 16),
+    MMAType.I32_32x32x16_I8: (32, 32, 16),
+    ScaledMMAType.F32_16x16x128_F8F6F4: (16, 16, 128),
+    ScaledMMAType.F32_32x32x64_F8F6F4: (32, 32, 64),
+}
+
+
 class MMAOperand(Enum):
     M = 0
     N = 1
     K = 2
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GenericDot:
     """
     mma implemented through vector dot products intead of hw intrinsics.
@@ -138,8 +161,233 @@ class GenericDot:
         else:
             return (n, m, k)
 
-    def __hash__(self):
-        return hash((self.out_vec_size, self.k_vec_size, self.k_mult, self.along_dim))
+
+# The MMA layouts only depend on the MMA type and the lane expression, which is
+# the same for every use of a hardware constraint, so building the sympy
+# expressions once is enough.
+@functools.lru_cache(maxsize=None)
+def _mma_index_offset(
+    mma_type: MMAType | ScaledMMAType | GenericDot,
+    lane: IndexExpr,
+    threads_per_wave: int,
+) -> tuple[IndexExpr, IndexExpr, IndexExpr]:
+    match mma_type:
+        # (M x K, N x K) -> M x N
+        case GenericDot():
+            offset = mma_type.get_index_offset(lane, threads_per_wave)
+        case MMAType.F32_16x16x16_F16 | MMAType.I32_16x16x16_I8:
+            offset = [
+                Piecewise(
+                    (lane % 16, ~MMA_ACC),
+                    (4 * floor(lane / 16), MMA_ACC),
+                ),  # M
+                lane % 16,  # N
+                4 * floor(lane / 16),  # K
+            ]
+        case MMAType.F32_32x32x8_F16 | MMAType.I32_32x32x8_I8:
+            offset = [
+                Piecewise(
+                    (lane % 32, ~MMA_ACC),
+                    (
+                        (8 * floor(GPR_NUM / 4) % 32)
+                        + 4 * floor(lane / 32)
+                        + (GPR_NUM % 4),
+                        MMA_ACC,
+                    ),
+                ),  # M
+                lane % 32,  # N
+                4 * floor(lane / 32),  # K
+            ]
+        case (
+            MMAType.F32_16x16x32_F8
+            | MMAType.F32_16x16x32_K8_F16
+            | MMAType.F32_16x16x32_K4_F8
+            | MMAType.I32_16x16x32_I8
+        ):
+            offset = [
+                Piecewise((lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)),  # M
+                lane % 16,  # N
+                8 * floor(lane / 16),  # K
+            ]
+            if mma_type == MMAType.F32_16x16x32_K4_F8:
+                offset = [
+                    Piecewise(
+                        (lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)
+                    ),  # M
+                    lane % 16,  # N
+                    (16 * floor(GPR_NUM / 4))
+                    + 4 * floor(lane / 16)
+                    + (GPR_NUM % 4),  # K
+                ]
+        case (
+            MMAType.F32_32x32x16_F8
+            | MMAType.F32_32x32x16_K8_F16
+            | MMAType.F32_32x32x16_K4_F8
+            | MMAType.I32_32x32x16_I8
+        ):
+            offset = [
+                Piecewise(
+                    (lane % 32, ~MMA_ACC),
+                    (
+                        (8 * floor(GPR_NUM / 4) % 32)
+                        + 4 * floor(lane / 32)
+                        + (GPR_NUM % 4),
+                        MMA_ACC,
+                    ),
+                ),  # M
+                lane % 32,  # N
+                8 * floor(lane / 32),  # K
+            ]
+            if mma_type == MMAType.F32_32x32x16_K4_F8:
+                offset = [
+                    Piecewise(
+                        (lane % 32, ~MMA_ACC),
+                        (
+                            (8 * floor(GPR_NUM / 4) % 32)
+                            + 4 * floor(lane / 32)
+                            + (GPR_NUM % 4),
+                            MMA_ACC,
+                        ),
+                    ),  # M
+                    lane % 32,  # N
+                    (8 * floor(GPR_NUM / 4))
+                    + 4 * floor(lane / 32)
+                    + (GPR_NUM % 4),  # K
+                ]
+        case ScaledMMAType.F32_16x16x128_F8F6F4:
+            offset = [
+                Piecewise((lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)),  # M
+                lane % 16,  # N
+                Piecewise(
+                    (
+                        64 * floor(GPR_NUM / 16)
+                        + 16 * floor(lane / 16)
+                        + (GPR_NUM % 16),
+                        ~(MMA_LHS_SCALE | MMA_RHS_SCALE | MMA_SCALE_FP4),
+                    ),
+                    (
+                        32 * floor(lane / 16),
+                        (MMA_LHS_SCALE | MMA_RHS_SCALE | MMA_SCALE_FP4),
+                    ),
+                ),  # K
+            ]
+        case ScaledMMAType.F32_32x32x64_F8F6F4:
+            offset = [
+                Piecewise(
+                    (lane % 32, ~MMA_ACC),
+                    (
+                        (8 * floor(GPR_NUM / 4) % 32)
+                        + 4 * floor(lane / 32)
+                        + (GPR_NUM % 4),
+                        MMA_ACC,
+                    ),
+                ),  # M
+                lane % 32,  # N
+                32 * floor(lane / 32),  # K
+            ]
+        case _:
+            raise ValueError("Unsupported MMA type")
+
+    return tuple(offset)
+
+
+@functools.lru_cache(maxsize=None)
+def _acc_piecewise(value: int) -> IndexExpr:
+    """
+    Returns `value` for the accumulator and 1 for the other MMA operands.
+    """
+    return Piecewise((1, ~MMA_ACC), (value, MMA_ACC))
+
+
+@functools.lru_cache(maxsize=None)
+def _mma_index_size_stride(
+    mma_type: MMAType | ScaledMMAType | GenericDot, threads_per_wave: int
+) -> tuple[tuple[IndexExpr, ...], tuple[IndexExpr, ...]]:
+    match mma_type:
+        # (M x K, N x K) -> M x N
+        case GenericDot():
+            size = mma_type.get_index_size(threads_per_wave)
+            stride = mma_type.get_index_stride(threads_per_wave)
+        case MMAType.F32_16x16x16_F16 | MMAType.I32_16x16x16_I8:
+            size = [
+                _acc_piecewise(4),  # M
+                1,  # N
+                4,  # K
+            ]
+            stride = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                1,  # K
+            ]
+        case MMAType.F32_32x32x8_F16 | MMAType.I32_32x32x8_I8:
+            size = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                4,  # K
+            ]
+            stride = [
+                _acc_piecewise(32),  # M
+                1,  # N
+                1,  # K
+            ]
+        case (
+            MMAType.F32_16x16x32_F8
+            | MMAType.F32_16x16x32_K8_F16
+            | MMAType.F32_16x16x32_K4_F8
+            | MMAType.I32_16x16x32_I8
+        ):
+            size = [
+                _acc_piecewise(4),  # M
+                1,  # N
+                8,  # K
+            ]
+            stride = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                1,  # K
+            ]
+        case (
+            MMAType.F32_32x32x16_F8
+            | MMAType.F32_32x32x16_K8_F16
+            | MMAType.F32_32x32x16_K4_F8
+            | MMAType.I32_32x32x16_I8
+        ):
+            size = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                8,  # K
+            ]
+            stride = [
+                _acc_piecewise(32),  # M
+                1,  # N
+                1,  # K
+            ]
+        case ScaledMMAType.F32_16x16x128_F8F6F4:
+            size = [
+                _acc_piecewise(4),  # M
+                1,  # N
+                32,  # K
+            ]
+            stride = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                1,  # K
+            ]
+        case ScaledMMAType.F32_32x32x64_F8F6F4:
+            size = [
+                _acc_piecewise(16),  # M
+                1,  # N
+                32,  # K
+            ]
+            stride = [
+                _acc_piecewise(32),  # M
+                1,  # N
+                1,  # K
+            ]
+        case _:
+            raise ValueError("Unsupported MMA type")
+
+    return tuple(size), tuple(stride)
 
 
 @dataclass
@@ -184,6 +432,13 @@ class DistributionConstraint(Constraint):
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    def _is_dim_aligned(self) -> bool:
+        """
+        Returns True if the work bound is the same as the dimension bound.
+        """
+        # Substitute the difference to walk both bounds in a single pass.
+        return subs_idxc(self.work_bound - self.dim_bound) == 0
+
     def get_index_bound(self, vector_shape: Optional[int]) -> Optional[IndexExpr]:
         """
         Returns the index bound for the constraint, which is usually an
@@ -225,15 +480,9 @@ class HardwareConstraint(Constraint):
         return self.max_bits_per_load // element_type.bitwidth()
 
     def get_thread_id_from_workgroup_dim(self, workgroup_dim: int) -> IndexSymbol:
-        match workgroup_dim:
-            case 0:
-                return THREAD_0
-            case 1:
-                return THREAD_1
-            case 2:
-                return THREAD_2
-            case _:
-                raise ValueError("Invalid workgroup dimension. Expected 0, 1 or 2.")
+        if workgroup_dim not in (0, 1, 2):
+            raise ValueError("Invalid workgroup dimension. Expected 0, 1 or 2.")
+        return _THREAD_IDS[workgroup_dim]
 
     def mma_matrix_shapes(
         self, mma_type: Optional[MMAType | ScaledMMAType]
@@ -242,161 +491,20 @@ class HardwareConstraint(Constraint):
         if mma_type is None:
             mma_type = self.mma_type
 
-        match mma_type:
-            # M x N x K
-            case GenericDot():
-                return mma_type.get_shape(self.threads_per_wave)
-            case MMAType.F32_16x16x16_F16 | MMAType.I32_16x16x16_I8:
-                return (16, 16, 16)
-            case MMAType.F32_32x32x8_F16 | MMAType.I32_32x32x8_I8:
-                return (32, 32, 8)
-            case (
-                MMAType.F32_16x16x32_F8
-                | MMAType.F32_16x16x32_K8_F16
-                | MMAType.F32_16x16x32_K4_F8
-                | MMAType.I32_16x16x32_I8
-            ):
-                return (16, 16, 32)
-            case (
-                MMAType.F32_32x32x16_F8
-                | MMAType.F32_32x32x16_K8_F16
-                | MMAType.F32_32x32x16_K4_F8
-                | MMAType.I32_32x32x16_I8
-            ):
-                return (32, 32, 16)
-            case ScaledMMAType.F32_16x16x128_F8F6F4:
-                return (16, 16, 128)
-            case ScaledMMAType.F32_32x32x64_F8F6F4:
-                return (32, 32, 64)
-            case _:
-                raise ValueError(f"Unsupported MMA type: {mma_type}")
+        if isinstance(mma_type, GenericDot):
+            return mma_type.get_shape(self.threads_per_wave)
+
+        try:
+            return _MMA_SHAPES[mma_type]
+        except KeyError:
+            raise ValueError(f"Unsupported MMA type: {mma_type}")
 
     def mma_index_offset(self, mma_type: Optional[MMAType | ScaledMMAType]):
         lane = self.linearized_thread_id % self.threads_per_wave
         if mma_type is None:
             mma_type = self.mma_type
 
-        match mma_type:
-            # (M x K, N x K) -> M x N
-            case GenericDot():
-                offset = mma_type.get_index_offset(lane, self.threads_per_wave)
-            case MMAType.F32_16x16x16_F16 | MMAType.I32_16x16x16_I8:
-                offset = [
-                    Piecewise(
-                        (lane % 16, ~MMA_ACC),
-                        (4 * floor(lane / 16), MMA_ACC),
-                    ),  # M
-                    lane % 16,  # N
-                    4 * floor(lane / 16),  # K
-                ]
-            case MMAType.F32_32x32x8_F16 | MMAType.I32_32x32x8_I8:
-                offset = [
-                    Piecewise(
-                        (lane % 32, ~MMA_ACC),
-                        (
-                            (8 * floor(GPR_NUM / 4) % 32)
-                            + 4 * floor(lane / 32)
-                            + (GPR_NUM % 4),
-                            MMA_ACC,
-                        ),
-                    ),  # M
-                    lane % 32,  # N
-                    4 * floor(lane / 32),  # K
-                ]
-            case (
-                MMAType.F32_16x16x32_F8
-                | MMAType.F32_16x16x32_K8_F16
-                | MMAType.F32_16x16x32_K4_F8
-                | MMAType.I32_16x16x32_I8
-            ):
-                offset = [
-                    Piecewise(
-                        (lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)
-                    ),  # M
-                    lane % 16,  # N
-                    8 * floor(lane / 16),  # K
-                ]
-                if mma_type == MMAType.F32_16x16x32_K4_F8:
-                    offset = [
-                        Piecewise(
-                            (lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)
-                        ),  # M
-                        lane % 16,  # N
-                        (16 * floor(GPR_NUM / 4))
-                        + 4 * floor(lane / 16)
-                        + (GPR_NUM % 4),  # K
-                    ]
-            case (
-                MMAType.F32_32x32x16_F8
-                | MMAType.F32_32x32x16_K8_F16
-                | MMAType.F32_32x32x16_K4_F8
-                | MMAType.I32_32x32x16_I8
-            ):
-                offset = [
-                    Piecewise(
-                        (lane % 32, ~MMA_ACC),
-                        (
-                            (8 * floor(GPR_NUM / 4) % 32)
-                            + 4 * floor(lane / 32)
-                            + (GPR_NUM % 4),
-                            MMA_ACC,
-                        ),
-                    ),  # M
-                    lane % 32,  # N
-                    8 * floor(lane / 32),  # K
-                ]
-                if mma_type == MMAType.F32_32x32x16_K4_F8:
-                    offset = [
-                        Piecewise(
-                            (lane % 32, ~MMA_ACC),
-                            (
-                                (8 * floor(GPR_NUM / 4) % 32)
-                                + 4 * floor(lane / 32)
-                                + (GPR_NUM % 4),
-                                MMA_ACC,
-                            ),
-                        ),  # M
-                        lane % 32,  # N
-                        (8 * floor(GPR_NUM / 4))
-                        + 4 * floor(lane / 32)
-                        + (GPR_NUM % 4),  # K
-                    ]
-            case ScaledMMAType.F32_16x16x128_F8F6F4:
-                offset = [
-                    Piecewise(
-                        (lane % 16, ~MMA_ACC), (4 * floor(lane / 16), MMA_ACC)
-                    ),  # M
-                    lane % 16,  # N
-                    Piecewise(
-                        (
-                            64 * floor(GPR_NUM / 16)
-                            + 16 * floor(lane / 16)
-                            + (GPR_NUM % 16),
-                            ~(MMA_LHS_SCALE | MMA_RHS_SCALE | MMA_SCALE_FP4),
-                        ),
-                        (
-                            32 * floor(lane / 16),
-                            (MMA_LHS_SCALE | MMA_RHS_SCALE | MMA_SCALE_FP4),
-                        ),
-                    ),  # K
-                ]
-            case ScaledMMAType.F32_32x32x64_F8F6F4:
-                offset = [
-                    Piecewise(
-                        (lane % 32, ~MMA_ACC),
-                        (
-                            (8 * floor(GPR_NUM / 4) % 32)
-                            + 4 * floor(lane / 32)
-                            + (GPR_NUM % 4),
-                            MMA_ACC,
-                        ),
-                    ),  # M
-                    lane % 32,  # N
-                    32 * floor(lane / 32),  # K
-                ]
-            case _:
-                raise ValueError("Unsupported MMA type")
-        return offset
+        return _mma_index_offset(mma_type, lane, self.threads_per_wave)
 
     @property
     def threads_per_block(self) -> tuple[int]:
@@ -406,17 +514,25 @@ class HardwareConstraint(Constraint):
 
     @property
     def linearized_thread_id(self) -> IndexExpr:
-        thread_ids = [THREAD_0, THREAD_1, THREAD_2]
-        threads_per_block = [
-            1,
-            self.threads_per_block[0],
-            self.threads_per_block[0] * self.threads_per_block[1],
-        ]
-        return sum([x * y for x, y in zip(thread_ids, threads_per_block)])
+        # `waves_per_block` is only filled in during compilation, so the cached
+        # expression is keyed on the block shape it was built for.
+        key = (self.threads_per_wave, self.waves_per_block)
+        cached = self.__dict__.get("_linearized_thread_id")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        threads_per_block = self.threads_per_block
+        thread_id = (
+            THREAD_0
+            + THREAD_1 * threads_per_block[0]
+            + THREAD_2 * threads_per_block[0] * threads_per_block[1]
+        )
+        self._linearized_thread_id = (key, thread_id)
+        return thread_id
 
     # Inline substitution for vector_size given index map. In the future we can add support for other members.
     def subs_vector_shapes(self, index_map: dict[IndexSymbol, int]):
-        if self.vector_shapes is None:
+        if not self.vector_shapes or not index_map:
             return
         for vector_dim, vector_size in self.vector_shapes.items():
             if isinstance(vector_size, IndexExpr):
@@ -454,89 +570,7 @@ class HardwareConstraint(Constraint):
             mma_type = self.mma_type
 
         offset = self.mma_index_offset(mma_type)
-        match mma_type:
-            # (M x K, N x K) -> M x N
-            case GenericDot():
-                size = mma_type.get_index_size(self.threads_per_wave)
-                stride = mma_type.get_index_stride(self.threads_per_wave)
-            case MMAType.F32_16x16x16_F16 | MMAType.I32_16x16x16_I8:
-                size = [
-                    Piecewise((1, ~MMA_ACC), (4, MMA_ACC)),  # M
-                    1,  # N
-                    4,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case MMAType.F32_32x32x8_F16 | MMAType.I32_32x32x8_I8:
-                size = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    4,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (32, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case (
-                MMAType.F32_16x16x32_F8
-                | MMAType.F32_16x16x32_K8_F16
-                | MMAType.F32_16x16x32_K4_F8
-                | MMAType.I32_16x16x32_I8
-            ):
-                size = [
-                    Piecewise((1, ~MMA_ACC), (4, MMA_ACC)),  # M
-                    1,  # N
-                    8,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case (
-                MMAType.F32_32x32x16_F8
-                | MMAType.F32_32x32x16_K8_F16
-                | MMAType.F32_32x32x16_K4_F8
-                | MMAType.I32_32x32x16_I8
-            ):
-                size = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    8,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (32, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case ScaledMMAType.F32_16x16x128_F8F6F4:
-                size = [
-                    Piecewise((1, ~MMA_ACC), (4, MMA_ACC)),  # M
-                    1,  # N
-                    32,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case ScaledMMAType.F32_32x32x64_F8F6F4:
-                size = [
-                    Piecewise((1, ~MMA_ACC), (16, MMA_ACC)),  # M
-                    1,  # N
-                    32,  # K
-                ]
-                stride = [
-                    Piecewise((1, ~MMA_ACC), (32, MMA_ACC)),  # M
-                    1,  # N
-                    1,  # K
-                ]
-            case _:
-                raise ValueError("Unsupported MMA type")
+        size, stride = _mma_index_size_stride(mma_type, self.threads_per_wave)
 
         assert isinstance(
             constraint_index, MMAOperand
@@ -586,7 +620,13 @@ class WorkgroupConstraint(DistributionConstraint):
 
     def apply(self) -> IndexSequence:
         if self.apply_fn:
-            return IndexSequence(self.apply_fn(self.wg_dim), 1)
+            # `wg_dim` may be remapped after construction, so the result of
+            # `apply_fn` is cached together with the symbol it was built for.
+            cached = self.__dict__.get("_apply_fn_start")
+            if cached is None or cached[0] != self.wg_dim:
+                cached = (self.wg_dim, self.apply_fn(self.wg_dim))
+                self._apply_fn_start = cached
+            return IndexSequence(cached[1], 1)
         return IndexSequence(self.wg_dim * self.tile_size, 1)
 
     @property
@@ -601,7 +641,7 @@ class WorkgroupConstraint(DistributionConstraint):
         bound = None
         # Work bound computed as `count * tile_size`, where `count` is
         # `ceiling(dim / tile_size)`. Check if dim perfectly aligned with tile size.
-        if subs_idxc(self.work_bound) != subs_idxc(self.dim_bound):
+        if not self._is_dim_aligned():
             bound = self.dim_bound
 
         if (
@@ -616,18 +656,20 @@ class WorkgroupConstraint(DistributionConstraint):
 
 
 def get_grid_shape(wg_constraints: list[WorkgroupConstraint]) -> list[IndexExpr]:
-    sorted_constraints = sorted(
-        [x for x in wg_constraints if x.primary], key=lambda x: x.workgroup_dim
-    )
-    # Currently not more than one primary constraint in each dimension supported.
-    if any(
-        sorted_constraints[i].workgroup_dim == sorted_constraints[i + 1].workgroup_dim
-        for i in range(len(sorted_constraints) - 1)
-    ):
-        raise ValueError(
-            "Multiple constraints in the same workgroup dimension are currently not supported."
-        )
-    grid: list[IndexExpr] = [constraint.count for constraint in sorted_constraints]
+    primary_constraints = {}
+    for constraint in wg_constraints:
+        if not constraint.primary:
+            continue
+        # Currently not more than one primary constraint in each dimension supported.
+        if constraint.workgroup_dim in primary_constraints:
+            raise ValueError(
+                "Multiple constraints in the same workgroup dimension are currently not supported."
+            )
+        primary_constraints[constraint.workgroup_dim] = constraint
+
+    grid: list[IndexExpr] = [
+        primary_constraints[dim].count for dim in sorted(primary_constraints)
+    ]
     return grid
 
 
@@ -690,7 +732,7 @@ class TilingConstraint(DistributionConstraint):
 
     def get_index_bound(self, vector_shape: Optional[int]) -> Optional[IndexExpr]:
         bound = None
-        if subs_idxc(self.work_bound) != subs_idxc(self.dim_bound):
+        if not self._is_dim_aligned():
             bound = self.dim_bound
 
         if (
@@ -824,12 +866,23 @@ def get_constrained_shape(
     all_same_type = lambda x, type: all(
         isinstance(constraint, type) for constraint in x
     )
+    distribution_constraints = [
+        constraint
+        for constraint in constraints
+        if isinstance(constraint, (WorkgroupConstraint, TilingConstraint))
+    ]
     for i, dim in enumerate(shape):
+        # Constraint dims are almost always plain symbols, for which a set
+        # lookup is enough instead of a full `has` traversal.
+        free_symbols = dim.free_symbols
         dim_constraints = [
             constraint
-            for constraint in constraints
-            if isinstance(constraint, (WorkgroupConstraint, TilingConstraint))
-            and dim.has(constraint.dim)
+            for constraint in distribution_constraints
+            if (
+                constraint.dim in free_symbols
+                if constraint.dim.is_Symbol
+                else dim.has(constraint.dim)
+            )
         ]
         if not dim_constraints:
             continue
@@ -840,11 +893,12 @@ def get_constrained_shape(
                 dim_constraints[0].dim, dim_constraints[0].tile_size
             )
             continue
-        constrained_shape[i] = [
-            constrained_shape[i].subs(x.dim, x.tile_size)
-            for x in dim_constraints
-            if isinstance(x, TilingConstraint)
-        ][0]
+        tiling_constraint = next(
+            x for x in dim_constraints if isinstance(x, TilingConstraint)
+        )
+        constrained_shape[i] = constrained_shape[i].subs(
+            tiling_constraint.dim, tiling_constraint.tile_size
+        )
     return tuple(constrained_shape)
 
 
@@ -864,12 +918,9 @@ class ReorderingConstraint:
     workgroup_dim: int
 
     def __post_init__(self):
-        self.wg_dim = None
-        match self.workgroup_dim:
-            case 0 | 1 | 2:
-                self.wg_dim = get_workgroup_symbol(self.workgroup_dim)
-            case _:
-                raise ValueError("Invalid workgroup dimension. Expected 0, 1, 2")
+        if self.workgroup_dim not in (0, 1, 2):
+            raise ValueError("Invalid workgroup dimension. Expected 0, 1, 2")
+        self.wg_dim = _WORKGROUP_IDS[self.workgroup_dim]
 
 
 @dataclass
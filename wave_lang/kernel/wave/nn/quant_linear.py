@@ -4,6 +4,7 @@
 # See https://llvm.org/LICENSE.txt for license information.
 # SPDX-License-Identifier: Apache-2.0 WITH LLVM-exception
 
+import functools
 import math
 import warnings
 
@@ -36,6 +37,32 @@ def get_quant_linear_kernel(
     dynamic_dims: bool = False,
     mfma_variant: MMAType = MMAType.F32_16x16x32_F8,
     use_bias: bool = False,
+):
+    [weight_scale, input_scale, quant_dtype] = quant_params
+    # Layers with the same shape and scales share one compiled kernel. Read the
+    # scales back once, every `.item()` syncs with the device.
+    return _get_quant_linear_kernel(
+        tuple(shape),
+        input_dtype,
+        weight_scale.item(),
+        input_scale.item(),
+        quant_dtype,
+        dynamic_dims,
+        mfma_variant,
+        use_bias,
+    )
+
+
+@functools.lru_cache
+def _get_quant_linear_kernel(
+    shape: tuple[int],
+    input_dtype: torch.dtype,
+    weight_scale: float,
+    input_scale: float,
+    quant_dtype: torch.dtype,
+    dynamic_dims: bool,
+    mfma_variant: MMAType,
+    use_bias: bool,
 ):
     # Input sizes
     B = tkl.sym.B
@@ -75,13 +102,14 @@ def get_quant_linear_kernel(
         constraints += [tkw.Assumption(K > BLOCK_K * 4)]
 
     input_wtype = torch_dtype_to_wave(input_dtype)
-    [weight_scale, input_scale, quant_dtype] = quant_params
+    quant_wtype = torch_dtype_to_wave(quant_dtype)
     [qdtype_min, qdtype_max] = torch_dtype_range(quant_dtype)
 
-    def clamp_tensor(source_reg, lower_bound, upper_bound):
-        clamped = tkw.minimum(source_reg, upper_bound)
+    def quantize_tensor(source_reg, scale, lower_bound, upper_bound):
+        scaled = source_reg * scale
+        clamped = tkw.minimum(scaled, upper_bound)
         clamped = tkw.maximum(clamped, lower_bound)
-        clamped = tkw.cast(clamped, torch_dtype_to_wave(quant_dtype))
+        clamped = tkw.cast(clamped, quant_wtype)
         return clamped
 
     # Wave-level micro-kernel.
@@ -93,30 +121,27 @@ def get_quant_linear_kernel(
     def gemm_core(a, b, c_reg, result):
         # TODO: Registers for quantization scaling of inputs. Remove once scalar
         # codegen is enabled.
-        a_scale = tkl.Register[B, M, K, input_wtype](1 / input_scale.item())
+        a_scale = tkl.Register[B, M, K, input_wtype](1 / input_scale)
         a_clamp_max = tkl.Register[B, M, K, input_wtype](qdtype_max)
         a_clamp_min = tkl.Register[B, M, K, input_wtype](qdtype_min)
-        b_scale = tkl.Register[N, K, input_wtype](1 / weight_scale.item())
+        b_scale = tkl.Register[N, K, input_wtype](1 / weight_scale)
         b_clamp_max = tkl.Register[N, K, input_wtype](qdtype_max)
         b_clamp_min = tkl.Register[N, K, input_wtype](qdtype_min)
-        a_scale_deq = tkl.Register[B, M, N, input_wtype](input_scale.item())
-        b_scale_deq = tkl.Register[B, M, N, input_wtype](weight_scale.item())
+        # Both dequantization scales are folded into a single multiply. The
+        # product can be below the smallest normal fp16 value, so it is applied
+        # to the f32 accumulator before the cast.
+        scale_deq = tkl.Register[B, M, N, tkl.f32](input_scale * weight_scale)
 
         @tkw.iterate(K, init_args=[c_reg])
         def repeat(
             acc: tkl.Register[B, M, N, tkl.f32],
         ) -> tkl.Register[B, M, N, tkl.f32]:
-            a_reg = tkw.read(a)
-            b_reg = tkw.read(b)
-            a_reg *= a_scale
-            a_reg = clamp_tensor(a_reg, a_clamp_min, a_clamp_max)
-            b_reg *= b_scale
-            b_reg = clamp_tensor(b_reg, b_clamp_min, b_clamp_max)
+            a_reg = quantize_tensor(tkw.read(a), a_scale, a_clamp_min, a_clamp_max)
+            b_reg = quantize_tensor(tkw.read(b), b_scale, b_clamp_min, b_clamp_max)
             acc = tkw.mma(a_reg, b_reg, acc)
             return acc
 
-        o = repeat
-        o = tkw.cast(o, input_wtype) * a_scale_deq * b_scale_deq
+        o = tkw.cast(repeat * scale_deq, input_wtype)
         tkw.write(
             o,
             result,
@@ -174,17 +199,13 @@ def get_quant_linear_kernel(
 
 
 def extract_quant_params(quant_params: dict):
+    # The scales are only read back as scalars, so a view is enough and there is
+    # no need to clone them.
     weight_scale = (
-        quant_params["weight_scale"]
-        .clone()
-        .detach()
-        .view(quant_params["weight_scale_shape"])
+        quant_params["weight_scale"].detach().view(quant_params["weight_scale_shape"])
     )
     input_scale = (
-        quant_params["input_scale"]
-        .clone()
-        .detach()
-        .view(quant_params["input_scale_shape"])
+        quant_params["input_scale"].detach().view(quant_params["input_scale_shape"])
     )
     qdtype = quant_params["qdtype"]
     return weight_scale, input_scale, qdtype
@@ -204,6 +225,7 @@ class WaveQuantLinear(nn.Module):
         bias=True,
         device=None,
         dtype=None,
+        cache_output=False,
     ):
         device = device or torch.device("cuda:0")
         dtype = dtype or torch.float16
@@ -243,6 +265,12 @@ class WaveQuantLinear(nn.Module):
         )
         if bias:
             raise ValueError("Bias is currently not supported")
+        # When enabled, the output buffer is kept across calls and reused as long
+        # as the output shape, dtype and device do not change. Returned tensors then alias each
+        # other and are overwritten by the next call, so this is only meant for
+        # inference (e.g. decode) where the result is consumed right away.
+        self.cache_output = cache_output
+        self._out_buf = None
 
     def reset_parameters(self) -> None:
         # Setting a=sqrt(5) in kaiming_uniform is the same as initializing with
@@ -259,30 +287,44 @@ class WaveQuantLinear(nn.Module):
         # Determine parameter shapes
         input_len = input.shape[-2]
         batch = input.shape[0:-2]
-
-        # Compute "flattened" batch shapes
-        flat_batch = math.prod(batch)
-        out_features = self.weight.shape[0]
-        output_shape = [flat_batch, input_len, out_features]
+        out_features = self.out_features
+        # Parameters are resolved through `nn.Module.__getattr__`, look them up
+        # once.
+        weight = self.weight
+        bias = self.bias
+
+        # Compute "flattened" batch shapes, rank 3 inputs are already flat.
+        is_flat = len(batch) == 1
+        flat_batch = batch[0] if is_flat else math.prod(batch)
+        if not is_flat:
+            input = input.flatten(0, -3) if batch else input.unsqueeze(0)
 
         # Setup and run kernel
-        output = torch.empty(
-            output_shape, dtype=self.weight.dtype, device=self.weight.device
-        )
-        if self.bias is None:
-            self.kernel(
-                input.view(flat_batch, input_len, input.shape[-1]), self.weight, output
+        output_shape = (flat_batch, input_len, out_features)
+        output = self._out_buf
+        if (
+            output is None
+            or output.shape != output_shape
+            or output.dtype != weight.dtype
+            or output.device != weight.device
+        ):
+            output = torch.empty(
+                output_shape,
+                dtype=weight.dtype,
+                device=weight.device,
             )
+            if self.cache_output:
+                self._out_buf = output
+        if bias is None:
+            self.kernel(input, weight, output)
         else:
-            self.kernel(
-                input.view(flat_batch, input_len, input.shape[-1]),
-                self.weight,
-                self.bias,
-                output,
-            )
+            self.kernel(input, weight, bias, output)
+
+        if is_flat:
+            return output
 
         # Return non flattened shape
-        return output.view(*batch, input_len, out_features)
+        return output.unflatten(0, batch) if batch else output.squeeze(0)
 
     def extra_repr(self) -> str:
         return f"in_features={self.in_features}, out_features={self.out_features}, bias={self.bias is not None}"
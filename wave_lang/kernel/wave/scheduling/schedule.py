@@ -10,6 +10,7 @@ import torch.fx as fx
 
 from wave_lang.support.logging import get_logger
 
+from ..._support.indexing import IndexExpr
 from ..._support.tracing import CapturedTrace
 from ...ops.wave_ops import CustomOp, IterArg, Iterate, get_custom
 from ..constraints import Constraint
@@ -44,9 +45,14 @@ from .schedule_enums import SchedulingType
 logger = get_logger("wave.scheduling.schedule")
 
 
+# Solver based scheduling types are numbered in [0x10, 0x20).
+_SOLVER_SCHEDULING_TYPES = frozenset(
+    ty for ty in SchedulingType if 0x10 <= ty.value < 0x20
+)
+
+
 def is_solver_based(scheduling_type: SchedulingType):
-    scheduling_ty_val = scheduling_type.value
-    return scheduling_ty_val >= 0x10 and scheduling_ty_val < 0x20
+    return scheduling_type in _SOLVER_SCHEDULING_TYPES
 
 
 def visualize_scheduling_graph(edges: list[Edge]):
@@ -61,6 +67,7 @@ def schedule_reduction(
     scheduling_type: SchedulingType = SchedulingType.NONE,
     override_schedule_file: str = None,
     dump_schedule_file: str = None,
+    pipelining_checks: dict[IndexExpr, bool] | None = None,
 ):
     """
     Clones the reduction graph and does the following:
@@ -73,9 +80,15 @@ def schedule_reduction(
     Args:
         override_schedule_file: If provided, load schedule from this file instead of computing it
         dump_schedule_file: If provided, dump the computed schedule to this file
+        pipelining_checks: If provided, caches the results of evaluating the
+            pipelining condition under the assumptions in `constraints`
     """
     if scheduling_type == SchedulingType.NONE:
         return {}
+    if override_schedule_file and not os.path.exists(override_schedule_file):
+        raise ValueError(
+            f"Override schedule file {override_schedule_file} does not exist"
+        )
     reduction_graph = trace.get_subgraph(reduction.subgraph_name)
     graph, node_map = graph_copy(reduction_graph)
     ignore_nodes, iter_args, output = annotate_resource_usage(graph)
@@ -84,10 +97,6 @@ def schedule_reduction(
     update_sort_keys(trace, graph)
 
     if override_schedule_file:
-        if not os.path.exists(override_schedule_file):
-            raise ValueError(
-                f"Override schedule file {override_schedule_file} does not exist"
-            )
         # Import here to avoid circular import
         from ..utils.print_utils import load_schedule
 
@@ -145,23 +154,27 @@ def schedule_reduction(
         if node not in inverse_node_map:
             continue
         custom = get_custom(inverse_node_map[node])
+        # Erase edges between outputs and iter args. Iter args are issued with
+        # their earliest user, so they are scheduled once all users are.
+        if isinstance(get_custom(node), IterArg):
+            node.args = ()
+            iter_args.append(custom)
+            continue
+        stage, stage_cycle = divmod(cycle, initiation_interval)
         custom.scheduling_parameters = {
             "absolute_cycle": cycle,
-            "cycle": cycle % initiation_interval,
-            "stage": cycle // initiation_interval,
+            "cycle": stage_cycle,
+            "stage": stage,
             "initiation_interval": initiation_interval,
         }
-        # Erase edges between outputs and iter args.
-        if isinstance(get_custom(node), IterArg):
-            node.args = ()
-            iter_args.append(custom)
 
     for custom in iter_args:
-        cycle = min([x.scheduling_parameters["absolute_cycle"] for x in custom.users])
+        cycle = min(x.scheduling_parameters["absolute_cycle"] for x in custom.users)
+        stage, stage_cycle = divmod(cycle, initiation_interval)
         custom.scheduling_parameters = {
             "absolute_cycle": cycle,
-            "cycle": cycle % initiation_interval,
-            "stage": cycle // initiation_interval,
+            "cycle": stage_cycle,
+            "stage": stage,
             "initiation_interval": initiation_interval,
         }
 
@@ -192,9 +205,14 @@ def schedule_reduction(
             )
             return {}
 
-        result = evaluate_with_assumptions(
-            constraints, max_induction_variable > num_stages - 1
-        )
+        condition = max_induction_variable > num_stages - 1
+        if pipelining_checks is None:
+            pipelining_checks = {}
+        if condition not in pipelining_checks:
+            pipelining_checks[condition] = evaluate_with_assumptions(
+                constraints, condition
+            )
+        result = pipelining_checks[condition]
         if not result:
             logger.warning(
                 "Not enough iterations to pipeline the loop. Skipping pipelining."
@@ -245,6 +263,9 @@ def schedule_graph(
     if not reduction_nodes:
         return
 
+    # Reductions tiled along the same dimension share the same pipelining
+    # condition, which only needs to be solved once.
+    pipelining_checks: dict[IndexExpr, bool] = {}
     for reduction_node in reduction_nodes:
         schedule_reduction(
             get_custom(reduction_node),
@@ -254,4 +275,5 @@ def schedule_graph(
             scheduling_type,
             override_schedule,
             dump_schedule,
+            pipelining_checks,
         )